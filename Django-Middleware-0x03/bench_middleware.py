@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Requests/s through the full MIDDLEWARE stack from settings.py, with the
+path routing layer (MIDDLEWARE_ROUTES) enabled and disabled.
+
+Runs the stack in-process against stub views, with an in-memory database
+and the request log redirected to a temporary file.
+Usage: python bench_middleware.py [requests per path]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import path
+
+import settings as project_settings
+
+PATHS = ("/static/app.css", "/health/", "/chats/")
+
+
+def ok(request, *args, **kwargs):
+    return HttpResponse("ok")
+
+
+urlpatterns = [
+    path("static/<path:name>", ok),
+    path("health/", ok),
+    path("chats/", ok),
+]
+
+
+def configure(log_dir):
+    options = {name: getattr(project_settings, name)
+               for name in dir(project_settings) if name.isupper()}
+    options.update(
+        ROOT_URLCONF=__name__,
+        ALLOWED_HOSTS=["*"],
+        DEBUG=False,
+        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+        REQUEST_LOG={**project_settings.REQUEST_LOG, "path": os.path.join(log_dir, "requests.log")},
+        LOGGING_CONFIG=None,
+    )
+    settings.configure(**options)
+    django.setup()
+
+
+def requests_per_second(handler, factory, count):
+    requests = [factory.get(p) for p in PATHS for _ in range(count)]
+    start = time.perf_counter()
+    for request in requests:
+        handler.get_response(request)
+    return len(requests) / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as log_dir:
+        configure(log_dir)
+        from django.core.handlers.base import BaseHandler
+        from django.test import RequestFactory
+        from chats import routing
+
+        factory = RequestFactory()
+        handler = BaseHandler()
+        handler.load_middleware()
+
+        results = {}
+        for label, routes in (("without routing", {}),
+                              ("with routing", project_settings.MIDDLEWARE_ROUTES)):
+            routing._router = routing.MiddlewareRouter(routes)
+            requests_per_second(handler, factory, 50)  # warm up
+            results[label] = requests_per_second(handler, factory, count)
+
+    print(f"{len(PATHS) * count} requests over {', '.join(PATHS)}")
+    for label, rate in results.items():
+        print(f"{label:>16}: {rate:>10,.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
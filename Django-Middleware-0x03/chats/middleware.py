@@ -1,35 +1,37 @@
-import logging
-from datetime import datetime
-
-# Configure logger for request logging
-logger = logging.getLogger(__name__)
-handler = logging.FileHandler("requests.log")   # Logs saved to requests.log
-formatter = logging.Formatter("%(message)s")
-handler.setFormatter(formatter)
-logger.addHandler(handler)
-logger.setLevel(logging.INFO)
+import time
+from chats.profiling import profiled
+from chats.routing import routed
+from chats.request_log import get_writer
 
 
+@routed
+@profiled
 class RequestLoggingMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        # Entries are written in batches by a background thread (settings.REQUEST_LOG)
+        self.writer = get_writer()
 
     def __call__(self, request):
-        # Get user info
-        user = request.user if request.user.is_authenticated else "Anonymous"
-
-        # Log timestamp, user, and request path
-        log_message = f"{datetime.now()} - User: {user} - Path: {request.path}"
-        logger.info(log_message)
+        started = time.perf_counter()
 
         # Continue request-response cycle
         response = self.get_response(request)
+
+        # Get user info
+        user = request.user if request.user.is_authenticated else "Anonymous"
+
+        # Queue timestamp, user, request path, status and duration
+        self.writer.log(time.time(), str(user), request.method, request.path,
+                        response.status_code, (time.perf_counter() - started) * 1000)
         return response
 
 from datetime import datetime
 from django.http import HttpResponseForbidden
 
 
+@routed
+@profiled
 class RestrictAccessByTimeMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -41,32 +43,26 @@ class RestrictAccessByTimeMiddleware:
         # Allowed period: 6 AM (06:00) → 9 PM (21:00)
         if current_hour < 6 or current_hour >= 21:
             return HttpResponseForbidden("Access to chats is restricted during these hours.")
-from django.http import HttpResponseForbidden
-from datetime import datetime, timedelta
 
-# In-memory store (simple for now; resets when server restarts)
-request_log = {}
+        return self.get_response(request)
+
+from django.http import HttpResponseForbidden
+from chats.ratelimit import limiter_from_settings
 
+@routed
+@profiled
 class OffensiveLanguageMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        # Sliding-window counters per (route, IP); limits come from settings.RATE_LIMITS
+        self.limiter = limiter_from_settings()
 
     def __call__(self, request):
         ip = self.get_client_ip(request)
 
-        # Only apply rate limiting on POST requests
-        if request.method == "POST":
-            now = datetime.now()
-            requests = request_log.get(ip, [])
-
-            # Remove requests older than 1 minute
-            requests = [t for t in requests if now - t < timedelta(minutes=1)]
-
-            if len(requests) >= 5:
-                return HttpResponseForbidden("Rate limit exceeded: Only 5 messages per minute allowed.")
-
-            requests.append(now)
-            request_log[ip] = requests
+        # Only routes/methods with a configured rule are limited (POST by default)
+        if not self.limiter.allow(ip, request.path, request.method):
+            return HttpResponseForbidden("Rate limit exceeded: too many requests, try again later.")
 
         return self.get_response(request)
 
@@ -80,27 +76,31 @@ class OffensiveLanguageMiddleware:
         return ip
 
 from django.http import HttpResponseForbidden
+from chats import roles
 
+@routed
+@profiled
 class RolepermissionMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        # Route -> required roles, compiled once (settings.ROLE_RULES)
+        self.rules = roles.RoleRules.from_settings()
 
     def __call__(self, request):
         """
         Middleware that only allows admins or moderators
         to perform restricted actions (like managing chats).
         """
+        required = self.rules.required_roles(request.path)
+        if required is None:
+            return self.get_response(request)  # unrestricted path: skip the check
+
         user = request.user
 
         # Check if user is authenticated
         if user.is_authenticated:
-            # Example: assuming User model has a "role" field
-            role = getattr(user, "role", None)
-
-            # Restrict non-admin/non-moderator users
-            if role not in ["admin", "moderator"]:
+            # Restrict users holding none of the required roles (cached per user)
+            if not roles.get_roles(request) & required:
                 return HttpResponseForbidden("Access denied: insufficient permissions.")
 
         return self.get_response(request)
-
-
@@ -0,0 +1,242 @@
+"""
+Per-request profiling for the middleware stack.
+
+- ProfilingMiddleware (first in MIDDLEWARE) times the whole request and
+  wraps it in connection.execute_wrapper() to count DB queries and their
+  time. Requests for PROFILING_STATS_PATH are passed through unprofiled.
+- ViewProfilingMiddleware (last in MIDDLEWARE) times URL resolution plus
+  the view, and names the sample after the resolved view. Running after
+  AuthenticationMiddleware, it answers PROFILING_STATS_PATH with the
+  aggregated stats as JSON for active staff users; clients in INTERNAL_IPS
+  are let in only if PROFILING_STATS_INTERNAL_IPS is set, since behind a
+  local reverse proxy every request comes from 127.0.0.1.
+- @profiled on a middleware class records its own (exclusive) time; the
+  time spent in undecorated middleware between ProfilingMiddleware and the
+  first profiled layer is reported as "framework".
+
+Samples are aggregated into per-view and per-middleware histograms. A
+request that runs the same SQL PROFILING_N_PLUS_ONE_THRESHOLD times or more
+is flagged as a likely N+1 pattern and logged.
+"""
+import functools
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponseNotFound, JsonResponse
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Power-of-two microsecond buckets with percentile estimates"""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = [0] * 40
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        value = int(value)
+        self.buckets[min(value.bit_length(), 39)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        target = p * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(1 << i, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class ViewStats:
+    __slots__ = ("wall_us", "db_us", "db_queries", "n_plus_one")
+
+    def __init__(self):
+        self.wall_us = Histogram()
+        self.db_us = Histogram()
+        self.db_queries = Histogram()
+        self.n_plus_one = 0
+
+
+_views = {}
+_middleware = {}
+_lock = threading.Lock()
+
+
+def record(profile):
+    with _lock:
+        stats = _views.get(profile.view)
+        if stats is None:
+            stats = _views[profile.view] = ViewStats()
+        stats.wall_us.add(profile.wall_us)
+        stats.db_us.add(profile.db_us)
+        stats.db_queries.add(profile.db_queries)
+        stats.n_plus_one += bool(profile.repeated)
+        for name, elapsed in profile.middleware_us.items():
+            histogram = _middleware.get(name)
+            if histogram is None:
+                histogram = _middleware[name] = Histogram()
+            histogram.add(elapsed)
+
+
+def snapshot():
+    """Aggregated stats as plain dicts (times in microseconds)."""
+    with _lock:
+        return {
+            "views": {
+                view: {
+                    "wall_us": s.wall_us.summary(),
+                    "db_us": s.db_us.summary(),
+                    "db_queries": s.db_queries.summary(),
+                    "n_plus_one_requests": s.n_plus_one,
+                }
+                for view, s in _views.items()
+            },
+            "middleware_us": {name: h.summary() for name, h in _middleware.items()},
+        }
+
+
+def reset():
+    with _lock:
+        _views.clear()
+        _middleware.clear()
+
+
+class RequestProfile:
+    """Timings collected while one request is being handled"""
+
+    def __init__(self):
+        self.view = "unresolved"
+        self.wall_us = 0
+        self.db_us = 0
+        self.db_queries = 0
+        self.sql = Counter()
+        self.repeated = {}
+        self.middleware_us = {}
+        self._stack = []   # [name, start, time spent in inner profiled layers]
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, start, inner = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.middleware_us[name] = self.middleware_us.get(name, 0) + (elapsed - inner) * 1e6
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_us += (time.perf_counter() - start) * 1e6
+            self.db_queries += 1
+            self.sql[sql] += 1
+
+
+def profiled(cls):
+    """Class decorator: record the exclusive time spent in a middleware's __call__."""
+    call = cls.__call__
+    name = f"{cls.__module__}.{cls.__qualname__}"
+
+    @functools.wraps(call)
+    def __call__(self, request):
+        profile = getattr(request, "_profile", None)
+        if profile is None:
+            return call(self, request)
+        profile.enter(name)
+        try:
+            return call(self, request)
+        finally:
+            profile.exit()
+
+    cls.__call__ = __call__
+    return cls
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.stats_path = getattr(settings, "PROFILING_STATS_PATH", "/_internal/profile/")
+        self.n_plus_one_threshold = getattr(settings, "PROFILING_N_PLUS_ONE_THRESHOLD", 5)
+
+    def __call__(self, request):
+        if request.path == self.stats_path:
+            return self.get_response(request)  # served by ViewProfilingMiddleware
+
+        profile = RequestProfile()
+        request._profile = profile
+        profile.enter("framework")
+        try:
+            with connection.execute_wrapper(profile.db_wrapper):
+                return self.get_response(request)
+        finally:
+            profile.exit()
+            profile.wall_us = sum(profile.middleware_us.values())
+            self._flag_repeated_sql(request, profile)
+            record(profile)
+
+    def _flag_repeated_sql(self, request, profile):
+        profile.repeated = {sql: n for sql, n in profile.sql.items()
+                            if n >= self.n_plus_one_threshold}
+        for sql, n in profile.repeated.items():
+            logger.warning("Possible N+1 in %s (%s): %d x %s",
+                           profile.view, request.path, n, sql)
+
+
+class ViewProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.stats_path = getattr(settings, "PROFILING_STATS_PATH", "/_internal/profile/")
+        self.internal_ips = (set(settings.INTERNAL_IPS)
+                             if getattr(settings, "PROFILING_STATS_INTERNAL_IPS", False)
+                             else set())
+
+    def __call__(self, request):
+        if request.path == self.stats_path:
+            if not self._may_see_stats(request):
+                return HttpResponseNotFound()
+            return JsonResponse(snapshot())
+
+        profile = getattr(request, "_profile", None)
+        if profile is None:
+            return self.get_response(request)
+        profile.enter("view")
+        try:
+            return self.get_response(request)
+        finally:
+            profile.exit()
+            match = getattr(request, "resolver_match", None)
+            if match is not None:
+                profile.view = match.view_name or match._func_path
+
+    def _may_see_stats(self, request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_active and user.is_staff:
+            return True
+        return request.META.get("REMOTE_ADDR") in self.internal_ips
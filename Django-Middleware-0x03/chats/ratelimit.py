@@ -0,0 +1,214 @@
+"""
+Rate limiting with sliding-window counters.
+
+A sliding window is approximated from two fixed windows: the previous
+window's count weighted by how much of it still overlaps, plus the current
+count. Rules come from settings.RATE_LIMITS as (path prefix, methods, limit,
+window seconds); the longest matching prefix wins and requests matching no
+rule are not limited.
+
+Counters live in a backend chosen by settings.RATE_LIMIT_BACKEND:
+LocalBackend keeps __slots__ counters in this process (O(1) per request,
+idle clients evicted by a background thread); CacheBackend shares them
+across workers and hosts through a Django cache. Both count only the
+requests they admit, so a client that keeps sending over the limit gets
+the same `limit` per window from either backend.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+DEFAULT_RATE_LIMITS = [
+    ("/", ("POST",), 5, 60),   # 5 messages per minute per IP
+]
+
+
+class SlidingWindowCounter:
+    """Approximate sliding window: previous window's count weighted by overlap"""
+
+    __slots__ = ("window_index", "current", "previous", "last_seen")
+
+    def __init__(self):
+        self.window_index = 0
+        self.current = 0
+        self.previous = 0
+        self.last_seen = 0.0
+
+    def hit(self, now, limit, window):
+        """Count one request at `now` if it fits under `limit`; return whether it did."""
+        index = int(now // window)
+        if index != self.window_index:
+            self.previous = self.current if index == self.window_index + 1 else 0
+            self.current = 0
+            self.window_index = index
+        self.last_seen = now
+        elapsed = (now % window) / window
+        if self.previous * (1 - elapsed) + self.current >= limit:
+            return False
+        self.current += 1
+        return True
+
+
+class RateLimitRule:
+    __slots__ = ("prefix", "methods", "limit", "window")
+
+    def __init__(self, prefix, methods, limit, window):
+        self.prefix = prefix
+        self.methods = frozenset(m.upper() for m in methods) if methods else None
+        self.limit = limit
+        self.window = window
+
+
+class LocalBackend:
+    """
+    Counters in this process only. Fast, but with several workers each one
+    enforces the limit separately.
+    """
+
+    def __init__(self, sweep_interval=60.0):
+        self.sweep_interval = sweep_interval
+        self._counters = {}
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    def hit(self, key, limit, window):
+        self._ensure_sweeper()
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = SlidingWindowCounter()
+                self._windows[key] = window
+            return counter.hit(now, limit, window)
+
+    def sweep(self):
+        """Drop counters idle for longer than two of their windows."""
+        now = time.monotonic()
+        with self._lock:
+            idle = [k for k, c in self._counters.items()
+                    if now - c.last_seen > 2 * self._windows[k]]
+            for k in idle:
+                del self._counters[k]
+                del self._windows[k]
+        return len(idle)
+
+    def _ensure_sweeper(self):
+        if self._sweeper is None:
+            with self._lock:
+                if self._sweeper is None:
+                    self._sweeper = threading.Thread(target=self._sweep_forever,
+                                                     name="ratelimit-sweeper", daemon=True)
+                    self._sweeper.start()
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            self.sweep()
+
+    def __len__(self):
+        return len(self._counters)
+
+
+class CacheBackend:
+    """
+    Counters shared by every worker through a Django cache.
+
+    Each request does one cache.incr() on the current window's key. That
+    is one round trip on Memcached and two on Django's RedisCache, which
+    checks the key exists first. The first request for a key in a window
+    also needs an add(), and a rejected request gives its count back with a
+    decr(), so it is not counted, matching LocalBackend. The previous
+    window's count no longer changes once the window has passed, so each
+    process reads it once per client and window and remembers it locally
+    (one memo per window length, so rules with different windows don't
+    keep clearing each other's).
+    Keys expire on their own after two windows, so no sweeping is needed.
+
+    The cache's incr/decr must be atomic across processes (Redis,
+    Memcached); file and database caches are fine for tests and single-host
+    setups only.
+    """
+
+    def __init__(self, alias="default", key_prefix="rl"):
+        self.alias = alias
+        self.key_prefix = key_prefix
+        self._previous = {}   # window -> (index, {key: previous window's count})
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, key, index):
+        return f"{self.key_prefix}:{':'.join(map(str, key))}:{index}"
+
+    def _incr(self, cache_key, window):
+        try:
+            return self.cache.incr(cache_key)
+        except ValueError:  # first request in this window
+            if self.cache.add(cache_key, 1, timeout=int(2 * window) + 1):
+                return 1
+            return self.cache.incr(cache_key)
+
+    def _previous_count(self, key, index, window):
+        with self._lock:
+            memo = self._previous.get(window)
+            if memo is None or memo[0] != index:
+                memo = self._previous[window] = (index, {})
+            counts = memo[1]
+            count = counts.get(key)
+        if count is None:
+            count = self.cache.get(self._key(key, index - 1), 0)
+            with self._lock:
+                counts[key] = count
+        return count
+
+    def hit(self, key, limit, window):
+        now = time.time()  # wall clock: windows must line up across processes
+        index = int(now // window)
+        cache_key = self._key(key, index)
+        current = self._incr(cache_key, window)
+        previous = self._previous_count(key, index, window)
+        elapsed = (now % window) / window
+        if previous * (1 - elapsed) + current - 1 < limit:
+            return True
+        try:
+            self.cache.decr(cache_key)  # rejected requests don't count
+        except ValueError:
+            pass  # the key expired in between
+        return False
+
+
+class RateLimiter:
+    """Per-route, per-client sliding-window limiter over a pluggable backend"""
+
+    def __init__(self, rules=None, backend=None):
+        rules = DEFAULT_RATE_LIMITS if rules is None else rules
+        # Longest prefix first so the first match is the most specific rule
+        self.rules = sorted((RateLimitRule(*r) for r in rules),
+                            key=lambda r: len(r.prefix), reverse=True)
+        self.backend = backend if backend is not None else LocalBackend()
+
+    def rule_for(self, path, method):
+        for rule in self.rules:
+            if path.startswith(rule.prefix) and (rule.methods is None or method in rule.methods):
+                return rule
+        return None
+
+    def allow(self, key, path, method):
+        """True if the request may proceed (and is counted), False if limited."""
+        rule = self.rule_for(path, method)
+        if rule is None:
+            return True
+        return self.backend.hit((rule.prefix, key), rule.limit, rule.window)
+
+
+def limiter_from_settings():
+    backend_path = getattr(settings, "RATE_LIMIT_BACKEND", "chats.ratelimit.LocalBackend")
+    backend_options = getattr(settings, "RATE_LIMIT_BACKEND_OPTIONS", {})
+    backend = import_string(backend_path)(**backend_options)
+    return RateLimiter(getattr(settings, "RATE_LIMITS", None), backend)
@@ -0,0 +1,166 @@
+"""
+Background request log writer.
+
+The request thread only puts a small tuple on a bounded queue (dropping it
+and counting the drop if the queue is full, rather than slowing the
+response). A writer thread formats queued entries, writes them in batches
+with one flush per batch, and rotates the file by size and/or age. A batch
+that can't be written (disk full, failed rotation) is counted in
+stats["write_errors"] / stats["failed"] and the file is reopened for the
+next one; the writer thread never dies on an I/O error.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+
+_STOP = object()
+
+DEFAULTS = {
+    "path": "requests.log",
+    "format": "text",          # "text" (original line format) or "json" (JSON lines)
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 5,
+    "rotate_seconds": None,    # e.g. 86400 for daily rotation
+    "queue_size": 10_000,
+    "batch_size": 500,
+    "flush_interval": 0.5,     # seconds a partial batch may wait
+}
+
+
+class RequestLogWriter:
+    def __init__(self, path, format="text", max_bytes=DEFAULTS["max_bytes"],
+                 backup_count=5, rotate_seconds=None, queue_size=10_000,
+                 batch_size=500, flush_interval=0.5):
+        self.path = path
+        self.format = format
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_seconds = rotate_seconds
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = {"written": 0, "dropped": 0, "batches": 0, "rotations": 0,
+                      "write_errors": 0, "failed": 0}
+        self._drop_lock = threading.Lock()  # "dropped" is counted on request threads
+        self._queue = queue.Queue(queue_size)
+        self._file = None
+        self._next_rotation = None
+        self._thread = threading.Thread(target=self._run, name="request-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, timestamp, user, method, path, status, duration_ms):
+        """Queue one entry; never blocks the request thread."""
+        try:
+            self._queue.put_nowait((timestamp, user, method, path, status, duration_ms))
+        except queue.Full:
+            with self._drop_lock:
+                self.stats["dropped"] += 1
+
+    def close(self):
+        """Write everything still queued and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    # -- writer thread ------------------------------------------------------
+    def _run(self):
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                batch = []
+                stop = item is _STOP
+                if not stop:
+                    batch.append(item)
+                while not stop and len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                    else:
+                        batch.append(item)
+                if batch:
+                    try:
+                        self._write(batch)
+                    except Exception:
+                        self.stats["write_errors"] += 1
+                        self.stats["failed"] += len(batch)
+                        self._close_file()  # reopened for the next batch
+                if stop:
+                    return
+        finally:
+            self._close_file()
+
+    def _format(self, entry):
+        timestamp, user, method, path, status, duration_ms = entry
+        if self.format == "json":
+            return json.dumps({"ts": timestamp, "user": user, "method": method,
+                               "path": path, "status": status,
+                               "duration_ms": round(duration_ms, 2)}) + "\n"
+        return f"{datetime.fromtimestamp(timestamp)} - User: {user} - Path: {path}\n"
+
+    def _write(self, batch):
+        if self._file is None:
+            self._open()
+        self._file.write("".join(map(self._format, batch)))
+        self._file.flush()
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+        if self._file.tell() >= self.max_bytes or (
+                self._next_rotation is not None and time.time() >= self._next_rotation):
+            try:
+                self._rotate()
+            except OSError:
+                # The batch is already written; just start a fresh handle next time
+                self.stats["write_errors"] += 1
+                self._close_file()
+
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self.rotate_seconds:
+            self._next_rotation = time.time() + self.rotate_seconds
+
+    def _close_file(self):
+        file, self._file = self._file, None
+        if file is not None:
+            try:
+                file.close()
+            except OSError:
+                pass  # buffered data can't be flushed; already counted as failed
+
+    def _rotate(self):
+        self._close_file()
+        if self.backup_count:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.stats["rotations"] += 1
+        self._open()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Process-wide writer configured from settings.REQUEST_LOG."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            options = {**DEFAULTS, **getattr(settings, "REQUEST_LOG", {})}
+            _writer = RequestLogWriter(**options)
+        return _writer
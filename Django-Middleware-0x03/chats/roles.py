@@ -0,0 +1,87 @@
+"""
+Role resolution and route authorization for RolepermissionMiddleware.
+
+Route rules come from settings.ROLE_RULES as (path prefix, required roles);
+the longest matching prefix wins and roles=None marks a path as
+unrestricted, as does an empty rule list. The rules are compiled once into
+a single regex, so paths that need no authorization are recognised with one
+match and never touch the user.
+
+A user's roles are cached per request and in the Django cache under a
+versioned key. The entry is deleted when the user is saved (post_save), and
+bumping settings.ROLE_CACHE_VERSION invalidates every entry at once.
+"""
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_save
+
+DEFAULT_ROLE_RULES = [
+    ("/", ("admin", "moderator")),
+]
+
+
+class RoleRules:
+    def __init__(self, rules):
+        # Longest prefix first: the regex alternation then picks the most specific rule
+        rules = sorted(rules, key=lambda rule: len(rule[0]), reverse=True)
+        self._required = [frozenset(roles) if roles is not None else None
+                          for _, roles in rules]
+        # No rules, no restrictions; "".join([]) would compile a match-all pattern
+        self._pattern = re.compile("|".join(
+            f"(?P<r{i}>{re.escape(prefix)})" for i, (prefix, _) in enumerate(rules))
+        ) if rules else None
+
+    @classmethod
+    def from_settings(cls):
+        return cls(getattr(settings, "ROLE_RULES", DEFAULT_ROLE_RULES))
+
+    def required_roles(self, path):
+        """Roles allowed on `path` (any one suffices), or None if unrestricted."""
+        match = self._pattern.match(path) if self._pattern is not None else None
+        if match is None:
+            return None
+        return self._required[int(match.lastgroup[1:])]
+
+
+def _cache():
+    return caches[getattr(settings, "ROLE_CACHE_ALIAS", "default")]
+
+
+def _cache_key(user_pk):
+    return f"roles:v{getattr(settings, 'ROLE_CACHE_VERSION', 1)}:{user_pk}"
+
+
+def load_roles(user):
+    """Roles straight from the user; the only place that may hit the database."""
+    # Example: assuming User model has a "role" field
+    role = getattr(user, "role", None)
+    return frozenset([role]) if role else frozenset()
+
+
+def get_roles(request):
+    """The request user's roles: request memo, then cache, then load_roles()."""
+    roles = getattr(request, "_roles", None)
+    if roles is None:
+        user = request.user
+        cache = _cache()
+        key = _cache_key(user.pk)
+        roles = cache.get(key)
+        if roles is None:
+            roles = load_roles(user)
+            cache.set(key, roles, getattr(settings, "ROLE_CACHE_TIMEOUT", 300))
+        request._roles = roles
+    return roles
+
+
+def invalidate_roles(user_pk):
+    _cache().delete(_cache_key(user_pk))
+
+
+def _user_saved(sender, instance, **kwargs):
+    invalidate_roles(instance.pk)
+
+
+post_save.connect(_user_saved, sender=settings.AUTH_USER_MODEL,
+                  dispatch_uid="chats.roles.invalidate_on_save")
@@ -0,0 +1,70 @@
+"""
+Path-based routing for the chats middleware.
+
+settings.MIDDLEWARE_ROUTES maps a middleware's dotted path to
+{"include": [prefixes], "exclude": [prefixes]}: with "include" the
+middleware only runs under those prefixes, and "exclude" prefixes always
+skip it. Middleware without an entry runs everywhere.
+
+All routes are compiled into one regex per middleware when the stack is
+built. The first routed middleware a request reaches works out the full set
+of middleware to skip for its path (memoized per path), and every other
+routed middleware only does a set lookup, so excluded requests pay almost
+nothing.
+"""
+import functools
+import re
+
+from django.conf import settings
+
+
+def _prefix_regex(prefixes):
+    if not prefixes:
+        return None
+    return re.compile("|".join(re.escape(p) for p in sorted(prefixes, key=len, reverse=True)))
+
+
+class MiddlewareRouter:
+    def __init__(self, routes):
+        self._routes = [
+            (name, _prefix_regex(route.get("include")), _prefix_regex(route.get("exclude")))
+            for name, route in routes.items()
+        ]
+        self.skipped = functools.lru_cache(maxsize=4096)(self._skipped)
+
+    def _skipped(self, path):
+        """Names of routed middleware that do not apply to `path`."""
+        skipped = set()
+        for name, include, exclude in self._routes:
+            if (include is not None and not include.match(path)) or (
+                    exclude is not None and exclude.match(path)):
+                skipped.add(name)
+        return frozenset(skipped)
+
+
+_router = None
+
+
+def get_router():
+    global _router
+    if _router is None:
+        _router = MiddlewareRouter(getattr(settings, "MIDDLEWARE_ROUTES", {}))
+    return _router
+
+
+def routed(cls):
+    """Class decorator: pass requests straight through on paths routed away from the middleware."""
+    call = cls.__call__
+    name = f"{cls.__module__}.{cls.__qualname__}"
+
+    @functools.wraps(call)
+    def __call__(self, request):
+        skip = getattr(request, "_skip_middleware", None)
+        if skip is None:
+            skip = request._skip_middleware = get_router().skipped(request.path)
+        if name in skip:
+            return self.get_response(request)
+        return call(self, request)
+
+    cls.__call__ = __call__
+    return cls
@@ -0,0 +1,345 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from chats import profiling
+from chats.ratelimit import CacheBackend, LocalBackend, RateLimiter
+from chats.request_log import RequestLogWriter
+from chats import roles
+from chats.roles import RoleRules
+from chats.routing import MiddlewareRouter, routed
+
+RULES = [("/", ("POST",), 5, 60), ("/api/", None, 2, 60)]
+
+
+class LocalBackendTest(SimpleTestCase):
+    def test_limit_per_client(self):
+        limiter = RateLimiter(RULES, LocalBackend())
+        results = [limiter.allow("1.1.1.1", "/chats/", "POST") for _ in range(6)]
+        self.assertEqual(results, [True] * 5 + [False])
+        self.assertTrue(limiter.allow("2.2.2.2", "/chats/", "POST"))
+
+    def test_unmatched_requests_are_not_limited(self):
+        limiter = RateLimiter(RULES, LocalBackend())
+        self.assertTrue(all(limiter.allow("1.1.1.1", "/chats/", "GET") for _ in range(10)))
+
+    def test_longest_prefix_wins(self):
+        limiter = RateLimiter(RULES, LocalBackend())
+        results = [limiter.allow("1.1.1.1", "/api/messages/", "GET") for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+
+class CacheBackendTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        tmpdir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmpdir.cleanup)
+        cache_settings = override_settings(CACHES={
+            "ratelimit": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": tmpdir.name,
+            },
+        })
+        cache_settings.enable()
+        cls.addClassCleanup(cache_settings.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        caches["ratelimit"].clear()
+
+    def test_limit_shared_between_limiters(self):
+        # Two limiters stand in for two worker processes sharing one cache
+        first = RateLimiter(RULES, CacheBackend(alias="ratelimit"))
+        second = RateLimiter(RULES, CacheBackend(alias="ratelimit"))
+        results = [limiter.allow("1.1.1.1", "/chats/", "POST")
+                   for limiter in (first, second) * 3]
+        self.assertEqual(results, [True] * 5 + [False])
+
+    def test_rejected_requests_are_not_counted(self):
+        backend = CacheBackend(alias="ratelimit")
+        limiter = RateLimiter(RULES, backend)
+        for _ in range(8):
+            limiter.allow("1.1.1.1", "/chats/", "POST")
+        key = backend._key(("/", "1.1.1.1"), int(time.time() // 60))
+        self.assertEqual(caches["ratelimit"].get(key), 5)
+
+    def test_previous_counts_memoized_per_window(self):
+        backend = CacheBackend(alias="ratelimit")
+        limiter = RateLimiter([("/", None, 100, 60), ("/api/", None, 100, 3600)], backend)
+        cache = caches["ratelimit"]
+        reads = []
+        real_get = cache.get
+
+        def get(key, default=None, **kwargs):
+            reads.append(key)
+            return real_get(key, default, **kwargs)
+
+        now = 7200.0 + 30  # mid-window for both rules
+        with mock.patch.object(cache, "get", get), \
+                mock.patch("chats.ratelimit.time.time", return_value=now):
+            for _ in range(5):
+                limiter.allow("1.1.1.1", "/chats/", "GET")
+                limiter.allow("1.1.1.1", "/api/", "GET")
+        previous = {backend._key(("/", "1.1.1.1"), int(now // 60) - 1),
+                    backend._key(("/api/", "1.1.1.1"), int(now // 3600) - 1)}
+        # Each previous window is read once, not once per alternation between rules
+        self.assertEqual(sorted(k for k in reads if k in previous), sorted(previous))
+
+
+class SteadyOverLimitTest(SimpleTestCase):
+    """A client posting over the limit gets the same allowance from both backends."""
+
+    def allowed_per_window(self, backend):
+        limiter = RateLimiter([("/", ("POST",), 5, 60)], backend)
+        allowed = []
+        start = 6000.0  # a window boundary
+        for window in range(3):
+            count = 0
+            for second in range(0, 60, 2):  # 30 posts a minute
+                with mock.patch("chats.ratelimit.time.monotonic",
+                                return_value=start + 60 * window + second), \
+                        mock.patch("chats.ratelimit.time.time",
+                                   return_value=start + 60 * window + second):
+                    count += limiter.allow("1.1.1.1", "/chats/", "POST")
+            allowed.append(count)
+        return allowed
+
+    @override_settings(CACHES={
+        "ratelimit": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    })
+    def test_backends_agree(self):
+        caches["ratelimit"].clear()
+        local = LocalBackend()
+        local._sweeper = True  # no background thread under mocked clocks
+        self.assertEqual(self.allowed_per_window(local),
+                         self.allowed_per_window(CacheBackend(alias="ratelimit")))
+
+
+class RequestLogWriterTest(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "requests.log")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_writes_batches(self):
+        writer = RequestLogWriter(self.path, flush_interval=0.01)
+        for i in range(10):
+            writer.log(time.time(), "alice", "GET", f"/chats/{i}/", 200, 1.0)
+        writer.close()
+        with open(self.path) as f:
+            self.assertEqual(len(f.readlines()), 10)
+        self.assertEqual(writer.stats["written"], 10)
+
+    def test_survives_write_errors(self):
+        writer = RequestLogWriter(self.path, flush_interval=0.01)
+        real_write = writer._write
+        failures = [OSError("No space left on device")]
+
+        def flaky_write(batch):
+            if failures:
+                raise failures.pop()
+            real_write(batch)
+
+        writer._write = flaky_write
+        writer.log(time.time(), "alice", "GET", "/lost/", 200, 1.0)
+        deadline = time.monotonic() + 5
+        while not writer.stats["write_errors"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.log(time.time(), "alice", "GET", "/kept/", 200, 1.0)
+        writer.close()
+        self.assertEqual(writer.stats["write_errors"], 1)
+        self.assertEqual(writer.stats["failed"], 1)
+        with open(self.path) as f:
+            self.assertIn("/kept/", f.read())
+
+
+class RoleRulesTest(SimpleTestCase):
+    def setUp(self):
+        self.rules = RoleRules([
+            ("/", ("admin", "moderator")),
+            ("/static/", None),
+            ("/chats/reports/", ("admin",)),
+        ])
+
+    def test_longest_prefix_wins(self):
+        self.assertEqual(self.rules.required_roles("/chats/reports/1/"), {"admin"})
+        self.assertEqual(self.rules.required_roles("/chats/"), {"admin", "moderator"})
+
+    def test_unrestricted_paths(self):
+        self.assertIsNone(self.rules.required_roles("/static/app.css"))
+        self.assertIsNone(RoleRules([("/chats/", ("admin",))]).required_roles("/login/"))
+
+    def test_no_rules_means_no_restrictions(self):
+        self.assertIsNone(RoleRules([]).required_roles("/chats/"))
+
+
+class GetRolesTest(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.user = get_user_model().objects.create_user("alice")
+        self.user.role = "admin"
+
+    def request(self):
+        request = RequestFactory().get("/chats/")
+        request.user = self.user
+        return request
+
+    def test_cached_per_request_and_in_cache(self):
+        with mock.patch("chats.roles.load_roles", wraps=roles.load_roles) as load:
+            first = self.request()
+            self.assertEqual(roles.get_roles(first), {"admin"})
+            self.assertEqual(roles.get_roles(first), {"admin"})
+            self.assertEqual(roles.get_roles(self.request()), {"admin"})
+        self.assertEqual(load.call_count, 1)
+
+    def test_version_bump_invalidates(self):
+        roles.get_roles(self.request())
+        self.user.role = "moderator"
+        with self.settings(ROLE_CACHE_VERSION=2):
+            self.assertEqual(roles.get_roles(self.request()), {"moderator"})
+
+    def test_saving_the_user_invalidates(self):
+        roles.get_roles(self.request())
+        self.user.role = "moderator"
+        self.assertEqual(roles.get_roles(self.request()), {"admin"})  # still cached
+        self.user.save()
+        self.assertEqual(roles.get_roles(self.request()), {"moderator"})
+
+
+class StaffUser:
+    is_active = True
+    is_staff = True
+
+
+class ProfilingTest(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        profiling.reset()
+        self.addCleanup(profiling.reset)
+        self.factory = RequestFactory()
+
+    def stack(self, view):
+        return profiling.ProfilingMiddleware(profiling.ViewProfilingMiddleware(view))
+
+    def query_view(self, times):
+        def view(request):
+            with connection.cursor() as cursor:
+                for _ in range(times):
+                    cursor.execute("SELECT 1")
+            return None
+        return view
+
+    def test_counts_queries_through_execute_wrapper(self):
+        profile = profiling.RequestProfile()
+        with connection.execute_wrapper(profile.db_wrapper):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.execute("SELECT 2")
+        self.assertEqual(profile.db_queries, 2)
+        self.assertEqual(profile.sql, {"SELECT 1": 1, "SELECT 2": 1})
+        self.assertGreater(profile.db_us, 0)
+
+    def test_samples_are_aggregated_per_view(self):
+        stack = self.stack(self.query_view(2))
+        for _ in range(3):
+            stack(self.factory.get("/chats/"))
+        stats = profiling.snapshot()["views"]["unresolved"]
+        self.assertEqual(stats["wall_us"]["count"], 3)
+        self.assertEqual(stats["db_queries"]["max"], 2)
+        self.assertEqual(stats["n_plus_one_requests"], 0)
+        self.assertIn("framework", profiling.snapshot()["middleware_us"])
+
+    @override_settings(PROFILING_N_PLUS_ONE_THRESHOLD=5)
+    def test_repeated_sql_is_flagged(self):
+        with self.assertLogs("chats.profiling", "WARNING"):
+            self.stack(self.query_view(5))(self.factory.get("/chats/"))
+        self.assertEqual(profiling.snapshot()["views"]["unresolved"]["n_plus_one_requests"], 1)
+
+    def stats_request(self, user, remote_addr="127.0.0.1"):
+        request = self.factory.get("/_internal/profile/", REMOTE_ADDR=remote_addr)
+        request.user = user
+        return self.stack(self.query_view(0))(request)
+
+    @override_settings(PROFILING_STATS_PATH="/_internal/profile/")
+    def test_stats_served_to_staff_only(self):
+        self.assertEqual(self.stats_request(StaffUser()).status_code, 200)
+        self.assertEqual(self.stats_request(AnonymousUser()).status_code, 404)
+        non_staff = StaffUser()
+        non_staff.is_staff = False
+        self.assertEqual(self.stats_request(non_staff).status_code, 404)
+        self.assertEqual(profiling.snapshot()["views"], {})  # stats requests aren't sampled
+
+    @override_settings(PROFILING_STATS_PATH="/_internal/profile/",
+                       INTERNAL_IPS=["127.0.0.1"], PROFILING_STATS_INTERNAL_IPS=True)
+    def test_internal_ips_need_explicit_opt_in(self):
+        self.assertEqual(self.stats_request(AnonymousUser()).status_code, 200)
+        self.assertEqual(self.stats_request(AnonymousUser(), "10.0.0.1").status_code, 404)
+        with self.settings(PROFILING_STATS_INTERNAL_IPS=False):
+            self.assertEqual(self.stats_request(AnonymousUser()).status_code, 404)
+
+
+class Recorder:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.ran.append(type(self).__name__)
+        return self.get_response(request)
+
+
+@routed
+class First(Recorder):
+    pass
+
+
+@routed
+class Second(Recorder):
+    pass
+
+
+class MiddlewareRouterTest(SimpleTestCase):
+    FIRST = f"{__name__}.First"
+    SECOND = f"{__name__}.Second"
+    ROUTES = {
+        FIRST: {"exclude": ["/static/", "/health/"]},
+        SECOND: {"include": ["/chats/"], "exclude": ["/chats/public/"]},
+    }
+
+    def setUp(self):
+        patcher = mock.patch("chats.routing._router", MiddlewareRouter(self.ROUTES))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_stack(self, path):
+        request = RequestFactory().get(path)
+        request.ran = []
+        First(Second(lambda request: request.ran))(request)
+        return request.ran
+
+    def test_skipped(self):
+        router = MiddlewareRouter(self.ROUTES)
+        self.assertEqual(router.skipped("/chats/1/"), frozenset())
+        self.assertEqual(router.skipped("/static/app.css"), {self.FIRST, self.SECOND})
+        self.assertEqual(router.skipped("/chats/public/"), {self.SECOND})
+        self.assertEqual(router.skipped("/login/"), {self.SECOND})
+
+    def test_matched_paths_run_in_order(self):
+        self.assertEqual(self.run_stack("/chats/1/"), ["First", "Second"])
+
+    def test_unmatched_paths_skip(self):
+        self.assertEqual(self.run_stack("/health/"), [])
+        self.assertEqual(self.run_stack("/chats/public/"), ["First"])
+        self.assertEqual(self.run_stack("/login/"), ["First"])
+
+    def test_unrouted_middleware_runs_everywhere(self):
+        self.assertEqual(MiddlewareRouter({}).skipped("/static/app.css"), frozenset())
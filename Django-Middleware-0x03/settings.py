@@ -17,6 +17,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "chats.profiling.ProfilingMiddleware",  # keep first: times everything below
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -27,8 +28,8 @@ MIDDLEWARE = [
      "chats.middleware.RequestLoggingMiddleware",
     "chats.middleware.RestrictAccessByTimeMiddleware",
     "chats.middleware.OffensiveLanguageMiddleware",
-     "chats.middleware.RolePermissionMiddleware",
-    "chats.middleware.RolepermissionMiddleware"
+    "chats.middleware.RolepermissionMiddleware",
+    "chats.profiling.ViewProfilingMiddleware",  # keep last: times URL resolution + view
 
 ] 
 ROOT_URLCONF = "Django-Middleware-0x03.urls"
@@ -43,3 +44,65 @@ DATABASES = {
 }
 
 STATIC_URL = "static/"
+
+# chats.profiling: per-view / per-middleware latency and DB query stats,
+# served as JSON on PROFILING_STATS_PATH to staff users only
+INTERNAL_IPS = ["127.0.0.1"]
+PROFILING_STATS_PATH = "/_internal/profile/"
+# Also serve the stats to INTERNAL_IPS without a login. Leave off behind a
+# reverse proxy on the same host: every request then comes from 127.0.0.1
+PROFILING_STATS_INTERNAL_IPS = False
+PROFILING_N_PLUS_ONE_THRESHOLD = 5  # identical SQL this many times in one request
+
+# chats.middleware.RolepermissionMiddleware: (path prefix, roles allowed or None
+# for unrestricted); longest prefix wins
+ROLE_RULES = [
+    ("/", ("admin", "moderator")),
+    (STATIC_URL if STATIC_URL.startswith("/") else "/" + STATIC_URL, None),
+]
+ROLE_CACHE_TIMEOUT = 300  # seconds
+ROLE_CACHE_VERSION = 1    # bump to invalidate every cached role set
+
+# Which chats middleware run for which paths (chats/routing.py); prefixes in
+# "exclude" skip the middleware, "include" limits it to those prefixes
+UNROUTED_PATHS = ["/static/", "/health/", "/favicon.ico", PROFILING_STATS_PATH]
+MIDDLEWARE_ROUTES = {
+    "chats.middleware.RequestLoggingMiddleware": {"exclude": UNROUTED_PATHS},
+    "chats.middleware.RestrictAccessByTimeMiddleware": {"exclude": UNROUTED_PATHS},
+    "chats.middleware.OffensiveLanguageMiddleware": {"exclude": UNROUTED_PATHS},
+    "chats.middleware.RolepermissionMiddleware": {"exclude": UNROUTED_PATHS},
+}
+
+# chats.middleware.RequestLoggingMiddleware (see chats/request_log.py for defaults)
+REQUEST_LOG = {
+    "path": "requests.log",
+    "format": "text",              # or "json" for JSON lines with status and duration
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 5,
+    "queue_size": 10_000,          # entries beyond this are dropped and counted
+    "batch_size": 500,
+    "flush_interval": 0.5,
+}
+
+# Rate limits for chats.middleware.OffensiveLanguageMiddleware:
+# (path prefix, methods, max requests, window in seconds); longest prefix wins
+RATE_LIMITS = [
+    ("/", ("POST",), 5, 60),
+]
+# LocalBackend: per-process counters. CacheBackend: shared through CACHES[alias]
+# (needs a cache with atomic incr such as Redis or Memcached across hosts)
+RATE_LIMIT_BACKEND = "chats.ratelimit.LocalBackend"
+RATE_LIMIT_BACKEND_OPTIONS = {"sweep_interval": 60}  # seconds between evictions of idle clients
+# RATE_LIMIT_BACKEND = "chats.ratelimit.CacheBackend"
+# RATE_LIMIT_BACKEND_OPTIONS = {"alias": "ratelimit"}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Local stand-in for a shared cache; swap for django.core.cache.backends.redis.RedisCache
+    "ratelimit": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "ratelimit_cache",
+    },
+}
@@ -1,15 +1,56 @@
 #!/usr/bin/env python3
 import sqlite3
+from urllib.request import pathname2url
+
+# Named performance profiles: PRAGMAs applied right after connecting.
+# "wal" lets readers and a writer run concurrently; "durable" keeps WAL but
+# fsyncs on every commit.
+PROFILES = {
+    "default": {},
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,   # negative = KiB, i.e. 64 MiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,       # ms
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -64 * 1024,
+        "busy_timeout": 5000,
+    },
+}
+
+# journal_mode can't be changed through a read-only connection
+_WRITE_ONLY_PRAGMAS = {"journal_mode"}
+
 
 class DatabaseConnection:
     """Custom context manager for handling SQLite DB connections"""
-    def __init__(self, db_name):
+    def __init__(self, db_name, profile="default", read_only=False):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile {profile!r}; choose from {sorted(PROFILES)}")
         self.db_name = db_name
+        self.profile = profile
+        self.read_only = read_only
         self.conn = None
 
     def __enter__(self):
         # Open the connection when entering the context
-        self.conn = sqlite3.connect(self.db_name)
+        pragmas = PROFILES[self.profile]
+        timeout = pragmas.get("busy_timeout", 5000) / 1000
+        if self.read_only:
+            # Quote the path so ?, # and % in file names aren't read as URI syntax
+            self.conn = sqlite3.connect(f"file:{pathname2url(self.db_name)}?mode=ro",
+                                        uri=True, timeout=timeout)
+        else:
+            self.conn = sqlite3.connect(self.db_name, timeout=timeout)
+        for name, value in pragmas.items():
+            if self.read_only and name in _WRITE_ONLY_PRAGMAS:
+                continue
+            self.conn.execute(f"PRAGMA {name} = {value}")
         return self.conn
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -25,7 +66,7 @@ class DatabaseConnection:
 
 # ✅ Using the context manager
 if __name__ == "__main__":
-    with DatabaseConnection("users.db") as conn:
+    with DatabaseConnection("users.db", profile="wal", read_only=True) as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM users")
         results = cursor.fetchall()
@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
+import re
 import sqlite3
+import time
+from collections import namedtuple
 
 class ExecuteQuery:
     """Custom context manager that executes a query with parameters"""
-    def __init__(self, db_name, query, params=None):
+    def __init__(self, db_name, query, params=None, stream=False, arraysize=1000, records=False):
         self.db_name = db_name
         self.query = query
         self.params = params if params else ()
+        self.stream = stream          # yield rows lazily instead of fetchall()
+        self.arraysize = arraysize    # rows per fetchmany() round in stream mode
+        self.records = records        # rows as namedtuples with column attributes
         self.conn = None
         self.cursor = None
         self.results = None
@@ -15,15 +21,43 @@ class ExecuteQuery:
         # Open DB connection
         self.conn = sqlite3.connect(self.db_name)
         self.cursor = self.conn.cursor()
+        self.cursor.arraysize = self.arraysize
 
         # Execute query with params
         self.cursor.execute(self.query, self.params)
-        self.results = self.cursor.fetchall()
+        make_row = self._row_factory()
+
+        if self.stream:
+            self.results = self._iter_rows(make_row)
+        else:
+            self.results = self.cursor.fetchall()
+            if make_row:
+                self.results = [make_row(row) for row in self.results]
 
         return self.results  # ✅ results available directly inside with-block
 
+    def _row_factory(self):
+        if not self.records or self.cursor.description is None:
+            return None
+        Row = namedtuple("Row", [col[0] for col in self.cursor.description], rename=True)
+        return Row._make
+
+    def _iter_rows(self, make_row):
+        """Rows from fetchmany(arraysize); only one batch is held at a time."""
+        cursor = self.cursor
+        while True:
+            batch = cursor.fetchmany()
+            if not batch:
+                return
+            if make_row:
+                batch = map(make_row, batch)
+            yield from batch
+
     def __exit__(self, exc_type, exc_val, exc_tb):
-        # Ensure commit/rollback and close connection
+        # Ensure commit/rollback and close connection; in stream mode this also
+        # ends the row iterator even if the body stopped reading early
+        if self.stream and self.results is not None:
+            self.results.close()
         if self.conn:
             if exc_type is None:
                 self.conn.commit()
@@ -36,6 +70,118 @@ class ExecuteQuery:
 
         return False  # Don’t suppress exceptions
 
+class ExecuteMany:
+    """
+    Context manager that runs one statement for many parameter sets.
+
+    - If the query contains "IN (?)" (e.g. "SELECT * FROM users WHERE id IN (?)";
+      spacing and case don't matter),
+      params is an iterable of values looked up batch_size at a time with
+      "IN (?, ?, ...)"; the rows are returned.
+    - Otherwise params is an iterable of tuples sent through executemany()
+      in batches of batch_size; the total rowcount is returned.
+
+    Pass conn to reuse a long-lived connection. It is not closed, and its
+    transaction belongs to the caller: the statement runs inside a SAVEPOINT
+    that is released on success (committing only if the caller had no
+    transaction open; otherwise the writes join the caller's transaction)
+    and rolled back to on failure, leaving the caller's earlier writes alone.
+    Short batches are padded with a repeated value so every batch uses the
+    same SQL text and hits sqlite3's per-connection prepared-statement cache.
+    Per-batch timings end up in self.batch_latencies (seconds).
+    If a batch fails, everything this statement wrote is rolled back and an
+    owned connection is closed before the error propagates.
+    """
+    SAVEPOINT = "execute_many"
+    IN_MARKER = re.compile(r"\bIN\s*\(\s*\?\s*\)", re.IGNORECASE)
+
+    def __init__(self, db_name, query, params, batch_size=500, conn=None,
+                 cached_statements=256):
+        self.db_name = db_name
+        self.query = query
+        self.params = params
+        self.batch_size = batch_size
+        self.cached_statements = cached_statements
+        self.conn = conn
+        self.owns_conn = conn is None
+        self.cursor = None
+        self.batch_latencies = []
+
+    def __enter__(self):
+        if self.owns_conn:
+            self.conn = sqlite3.connect(self.db_name, cached_statements=self.cached_statements)
+        self.cursor = self.conn.cursor()
+        if not self.owns_conn:
+            self.conn.execute(f"SAVEPOINT {self.SAVEPOINT}")
+        # The work runs here, so a failure never reaches __exit__; clean up now
+        try:
+            marker = self.IN_MARKER.search(self.query)
+            if marker:
+                return self._lookup(marker)
+            return self._executemany()
+        except BaseException as e:
+            self.__exit__(type(e), e, e.__traceback__)
+            raise
+
+    def _batches(self):
+        batch = []
+        for item in self.params:
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _lookup(self, marker):
+        placeholders = ", ".join("?" * self.batch_size)
+        sql = f"{self.query[:marker.start()]}IN ({placeholders}){self.query[marker.end():]}"
+        rows = []
+        for batch in self._batches():
+            batch += [batch[-1]] * (self.batch_size - len(batch))  # same SQL text every time
+            began = time.perf_counter()
+            rows.extend(self.cursor.execute(sql, batch).fetchall())
+            self.batch_latencies.append(time.perf_counter() - began)
+        return rows
+
+    def _executemany(self):
+        total = 0
+        for batch in self._batches():
+            began = time.perf_counter()
+            self.cursor.executemany(self.query, batch)
+            self.batch_latencies.append(time.perf_counter() - began)
+            total += self.cursor.rowcount
+        return total
+
+    def latency_report(self):
+        """Batch count plus mean / max per-batch latency in milliseconds."""
+        latencies = self.batch_latencies
+        if not latencies:
+            return {"batches": 0, "mean_ms": None, "max_ms": None}
+        return {
+            "batches": len(latencies),
+            "mean_ms": 1000 * sum(latencies) / len(latencies),
+            "max_ms": 1000 * max(latencies),
+        }
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.owns_conn:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        else:
+            # Undo only this statement; the caller's transaction is theirs
+            if exc_type is not None:
+                self.conn.execute(f"ROLLBACK TO {self.SAVEPOINT}")
+            self.conn.execute(f"RELEASE {self.SAVEPOINT}")
+        if self.cursor:
+            self.cursor.close()
+        if self.owns_conn:
+            self.conn.close()
+
+        return False  # Don’t suppress exceptions
+
 # ✅ Example usage
 if __name__ == "__main__":
     query = "SELECT * FROM users WHERE age > ?"
@@ -1,29 +1,41 @@
 #!/usr/bin/env python3
 import asyncio
 import aiosqlite
+from async_cache import AsyncQueryCache, cached
+from async_pool import AsyncConnectionPool, QueryRunner
 
 DB_NAME = "users.db"
 
-async def async_fetch_users():
+query_cache = AsyncQueryCache(ttl=60, stale_ttl=30)
+
+@cached(query_cache, ignore=("runner",))
+async def async_fetch_users(runner=None):
     """Fetch all users asynchronously"""
+    if runner is not None:
+        return await runner.fetch("SELECT * FROM users")
     async with aiosqlite.connect(DB_NAME) as db:
         async with db.execute("SELECT * FROM users") as cursor:
             results = await cursor.fetchall()
             return results
 
-async def async_fetch_older_users():
+@cached(query_cache, ignore=("runner",))
+async def async_fetch_older_users(runner=None):
     """Fetch users older than 40 asynchronously"""
+    if runner is not None:
+        return await runner.fetch("SELECT * FROM users WHERE age > ?", (40,))
     async with aiosqlite.connect(DB_NAME) as db:
         async with db.execute("SELECT * FROM users WHERE age > 40") as cursor:
             results = await cursor.fetchall()
             return results
 
 async def fetch_concurrently():
-    """Run both queries concurrently"""
-    users, older_users = await asyncio.gather(
-        async_fetch_users(),
-        async_fetch_older_users()
-    )
+    """Run both queries concurrently over a shared connection pool"""
+    async with AsyncConnectionPool(DB_NAME, size=4) as pool:
+        runner = QueryRunner(pool, concurrency=8, timeout=10)
+        users, older_users = await asyncio.gather(
+            async_fetch_users(runner=runner),
+            async_fetch_older_users(runner=runner)
+        )
 
     print("✅ All Users:")
     for row in users:
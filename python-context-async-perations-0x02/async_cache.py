@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Result cache for async query coroutines with request coalescing.
+
+Concurrent misses for the same call share one in-flight task, and entries
+past their TTL are served stale (within stale_ttl) while a single background
+task refreshes them, so hot keys never wait on expiry.
+"""
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+
+
+class AsyncSingleFlight:
+    """Run one coroutine per key at a time; other awaiters share its result"""
+
+    def __init__(self):
+        self._tasks = {}
+        self.stats = {"executions": 0, "shared": 0}
+
+    def in_flight(self, key):
+        return key in self._tasks
+
+    def start(self, key, coro_fn):
+        """Return the running task for key, starting coro_fn() if there is none."""
+        task = self._tasks.get(key)
+        if task is not None:
+            self.stats["shared"] += 1
+            return task
+        self.stats["executions"] += 1
+        task = asyncio.ensure_future(coro_fn())
+        self._tasks[key] = task
+        task.add_done_callback(functools.partial(self._finished, key))
+        return task
+
+    async def do(self, key, coro_fn):
+        # shield: one awaiter being cancelled must not cancel the shared task
+        return await asyncio.shield(self.start(key, coro_fn))
+
+    def _finished(self, key, task):
+        self._tasks.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every awaiter went away
+
+
+class AsyncQueryCache:
+    """LRU + TTL + stale-while-revalidate cache for coroutine results"""
+
+    def __init__(self, max_entries=256, ttl=60.0, stale_ttl=30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()  # key -> (value, fresh_until, stale_until)
+        self.flights = AsyncSingleFlight()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0}
+
+    async def get_or_load(self, key, coro_fn):
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                self.stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return value
+            if now < stale_until:
+                self.stats["stale_hits"] += 1
+                if not self.flights.in_flight(key):
+                    self.flights.start(key, functools.partial(self._load, key, coro_fn))
+                return value
+        self.stats["misses"] += 1
+        return await self.flights.do(key, functools.partial(self._load, key, coro_fn))
+
+    async def _load(self, key, coro_fn):
+        value = await coro_fn()
+        now = time.monotonic()
+        self._entries[key] = (value, now + self.ttl, now + self.ttl + self.stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+def cached(cache, ignore=()):
+    """
+    Decorator caching an async function's result per (function, arguments);
+    keyword arguments named in `ignore` (e.g. a connection) are left out of the key.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key_kwargs = tuple(sorted((k, v) for k, v in kwargs.items() if k not in ignore))
+            key = (func.__qualname__, args, key_kwargs)
+            return await cache.get_or_load(key, lambda: func(*args, **kwargs))
+        return wrapper
+    return decorator
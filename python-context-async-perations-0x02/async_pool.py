@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Pool of aiosqlite connections and a bounded-concurrency query runner.
+
+QueryRunner fans many queries out over the pool with at most `concurrency`
+in flight, applies a per-query timeout and can stream rows with async
+iteration (fetchmany batches) so large results never sit in memory at once.
+A connection whose query was cancelled or timed out is interrupted and
+closed rather than returned, since its worker thread may still be running
+the statement.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+
+class AsyncConnectionPool:
+    """Up to `size` aiosqlite connections to one database, created on demand"""
+
+    def __init__(self, db_name, size=5):
+        self.db_name = db_name
+        self.size = size
+        self._idle = asyncio.Queue()
+        self._checkouts = asyncio.Semaphore(size)
+        self._created = 0
+        self.stats = {"checkouts": 0, "created": 0, "discarded": 0}
+
+    async def acquire(self):
+        # Every live connection holds one permit; release() and discard()
+        # return it, so a waiter wakes whether the connection came back to
+        # the idle queue or was thrown away.
+        await self._checkouts.acquire()
+        self.stats["checkouts"] += 1
+        if not self._idle.empty():
+            return self._idle.get_nowait()
+        self._created += 1
+        try:
+            conn = await aiosqlite.connect(self.db_name)
+        except BaseException:
+            self._created -= 1
+            self._checkouts.release()
+            raise
+        self.stats["created"] += 1
+        return conn
+
+    async def release(self, conn):
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+        except BaseException:
+            await self.discard(conn)
+            raise
+        self._idle.put_nowait(conn)
+        self._checkouts.release()
+
+    async def discard(self, conn):
+        """Drop a connection that may still be busy; it closes in the background."""
+        self._created -= 1
+        self.stats["discarded"] += 1
+        self._checkouts.release()
+        try:
+            await conn.interrupt()  # abort the statement still running on its thread
+        finally:
+            asyncio.ensure_future(conn.close())
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        try:
+            yield conn
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            await self.discard(conn)
+            raise
+        except BaseException:
+            await self.release(conn)
+            raise
+        else:
+            await self.release(conn)
+
+    async def close(self):
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            self._created -= 1
+            await conn.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
+
+
+class QueryRunner:
+    """Run queries over a pool with bounded fan-out and per-query timeouts"""
+
+    def __init__(self, pool, concurrency=10, timeout=None):
+        self.pool = pool
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def fetch(self, query, params=(), timeout=None):
+        """All rows of one query; raises asyncio.TimeoutError past the timeout."""
+        timeout = self.timeout if timeout is None else timeout
+        async with self._slots:
+            return await asyncio.wait_for(self._fetch(query, params), timeout)
+
+    async def _fetch(self, query, params):
+        async with self.pool.connection() as conn:
+            async with conn.execute(query, params) as cursor:
+                return await cursor.fetchall()
+
+    async def fetch_many(self, queries, return_exceptions=True):
+        """
+        Run (query, params) pairs (or bare query strings) concurrently, at most
+        `concurrency` at a time. Results come back in input order; failed or
+        timed-out queries yield their exception when return_exceptions is set.
+        """
+        tasks = [
+            asyncio.ensure_future(
+                self.fetch(*((q,) if isinstance(q, str) else q)))
+            for q in queries
+        ]
+        try:
+            return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        finally:
+            # Caller cancelled or a query failed without return_exceptions
+            for task in tasks:
+                task.cancel()
+
+    async def iterate(self, query, params=(), arraysize=500, timeout=None):
+        """Async generator over rows, fetched arraysize at a time."""
+        timeout = self.timeout if timeout is None else timeout
+        async with self._slots:
+            async with self.pool.connection() as conn:
+                async with conn.execute(query, params) as cursor:
+                    while True:
+                        rows = await asyncio.wait_for(cursor.fetchmany(arraysize), timeout)
+                        if not rows:
+                            return
+                        for row in rows:
+                            yield row
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Concurrent reader/writer throughput for each DatabaseConnection profile.
+
+Each profile gets a fresh scratch database; READERS threads run point reads
+while one writer thread runs single-row update transactions for SECONDS.
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+databaseconnection = __import__('0-databaseconnection')
+DatabaseConnection = databaseconnection.DatabaseConnection
+
+READERS = 4
+SECONDS = 3.0
+ROWS = 10_000
+
+
+def seed_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?)",
+                     ((i, f"user{i}", f"user{i}@example.com", i % 90) for i in range(ROWS)))
+    conn.commit()
+    conn.close()
+
+
+def run(path, profile):
+    stop = time.monotonic() + SECONDS
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader(n):
+        done = errors = 0
+        with DatabaseConnection(path, profile=profile, read_only=True) as conn:
+            while time.monotonic() < stop:
+                try:
+                    conn.execute("SELECT * FROM users WHERE id = ?", ((n * 7919 + done) % ROWS,)).fetchone()
+                    done += 1
+                except sqlite3.OperationalError:
+                    errors += 1
+        with lock:
+            counts["reads"] += done
+            counts["errors"] += errors
+
+    def writer():
+        done = errors = 0
+        with DatabaseConnection(path, profile=profile) as conn:
+            while time.monotonic() < stop:
+                try:
+                    conn.execute("UPDATE users SET age = age + 1 WHERE id = ?", (done % ROWS,))
+                    conn.commit()
+                    done += 1
+                except sqlite3.OperationalError:
+                    conn.rollback()
+                    errors += 1
+        with lock:
+            counts["writes"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(READERS)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {k: v / SECONDS for k, v in counts.items()}
+
+
+def main():
+    profiles = sys.argv[1:] or list(databaseconnection.PROFILES)
+    print(f"{'profile':>10} {'reads/s':>12} {'writes/s':>10} {'errors/s':>10}")
+    for profile in profiles:
+        scratch = tempfile.mkdtemp()
+        try:
+            path = os.path.join(scratch, "bench.db")
+            seed_db(path)
+            rates = run(path, profile)
+        finally:
+            shutil.rmtree(scratch)
+        print(f"{profile:>10} {rates['reads']:>12,.0f} {rates['writes']:>10,.0f} "
+              f"{rates['errors']:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
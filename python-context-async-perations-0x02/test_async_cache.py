@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the async result cache and its request coalescing.
+"""
+import asyncio
+import unittest
+
+from async_cache import AsyncQueryCache, AsyncSingleFlight, cached
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """Tests for AsyncSingleFlight."""
+
+    async def test_concurrent_awaiters_share_one_task(self):
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "rows"
+
+        results = await asyncio.gather(*(flights.do("key", load) for _ in range(10)))
+        self.assertEqual(results, ["rows"] * 10)
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(flights.in_flight("key"))
+
+    async def test_cancelled_awaiter_does_not_cancel_others(self):
+        flights = AsyncSingleFlight()
+
+        async def load():
+            await asyncio.sleep(0.05)
+            return "rows"
+
+        first = asyncio.ensure_future(flights.do("key", load))
+        second = asyncio.ensure_future(flights.do("key", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, "rows")
+
+
+class TestAsyncQueryCache(unittest.IsolatedAsyncioTestCase):
+    """Tests for AsyncQueryCache and the cached decorator."""
+
+    async def test_hit_after_miss(self):
+        cache = AsyncQueryCache(ttl=60)
+        calls = []
+
+        @cached(cache, ignore=("conn",))
+        async def fetch(query, conn=None):
+            calls.append(conn)
+            return [query]
+
+        self.assertEqual(await fetch("q", conn="a"), ["q"])
+        self.assertEqual(await fetch("q", conn="b"), ["q"])
+        self.assertEqual(calls, ["a"])
+        self.assertEqual(cache.stats, {"hits": 1, "stale_hits": 0, "misses": 1})
+
+    async def test_stale_served_then_refreshed(self):
+        cache = AsyncQueryCache(ttl=0, stale_ttl=60)
+        version = [1]
+
+        async def load():
+            await asyncio.sleep(0.01)
+            return version[0]
+
+        self.assertEqual(await cache.get_or_load("key", load), 1)
+        version[0] = 2
+        self.assertEqual(await cache.get_or_load("key", load), 1)  # stale, refresh starts
+        self.assertTrue(cache.flights.in_flight("key"))
+        await asyncio.sleep(0.05)
+        self.assertEqual(cache._entries["key"][0], 2)
+        self.assertEqual(cache.stats["stale_hits"], 1)
+
+    async def test_lru_bound(self):
+        cache = AsyncQueryCache(max_entries=2)
+
+        async def value(v):
+            return v
+
+        for key in "abc":
+            await cache.get_or_load(key, lambda key=key: value(key))
+        self.assertEqual(list(cache._entries), ["b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the aiosqlite connection pool and query runner.
+"""
+import asyncio
+import unittest
+
+from async_pool import AsyncConnectionPool, QueryRunner
+
+SLOW = ("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c "
+        "WHERE x < 100000000) SELECT count(*) FROM c")
+
+
+class TestAsyncConnectionPool(unittest.IsolatedAsyncioTestCase):
+    """Tests for AsyncConnectionPool and QueryRunner."""
+
+    async def test_reuses_connections(self):
+        """Sequential checkouts share one connection."""
+        async with AsyncConnectionPool(":memory:", size=3) as pool:
+            runner = QueryRunner(pool)
+            for i in range(5):
+                self.assertEqual(await runner.fetch("SELECT ?", (i,)), [(i,)])
+            self.assertEqual(pool.stats["created"], 1)
+
+    async def test_size_bounds_connections(self):
+        """No more than `size` connections exist under load."""
+        async with AsyncConnectionPool(":memory:", size=2) as pool:
+            runner = QueryRunner(pool, concurrency=10)
+            results = await runner.fetch_many(["SELECT 1"] * 20)
+            self.assertEqual(results, [[(1,)]] * 20)
+            self.assertLessEqual(pool.stats["created"], 2)
+
+    async def test_timeout_wakes_queued_waiter(self):
+        """A query queued behind a timed-out one gets a fresh connection."""
+        async with AsyncConnectionPool(":memory:", size=1) as pool:
+            runner = QueryRunner(pool, concurrency=4)
+            slow = asyncio.ensure_future(runner.fetch(SLOW, timeout=0.2))
+            await asyncio.sleep(0.05)
+            queued = asyncio.ensure_future(runner.fetch("SELECT 1"))
+
+            with self.assertRaises(asyncio.TimeoutError):
+                await slow
+            self.assertEqual(await asyncio.wait_for(queued, 5), [(1,)])
+            self.assertEqual(pool.stats["discarded"], 1)
+            self.assertEqual(pool._created, 1)
+
+    async def test_iterate(self):
+        """iterate streams every row of the result."""
+        async with AsyncConnectionPool(":memory:", size=1) as pool:
+            runner = QueryRunner(pool)
+            query = ("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 "
+                     "FROM c WHERE x < 1234) SELECT x FROM c")
+            rows = [row async for row in runner.iterate(query, arraysize=100)]
+            self.assertEqual(len(rows), 1234)
+
+
+if __name__ == "__main__":
+    unittest.main()
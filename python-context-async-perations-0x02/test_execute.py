@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the ExecuteQuery and ExecuteMany context managers.
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+execute = __import__('1-execute')
+
+
+class TestExecute(unittest.TestCase):
+    """Tests for 1-execute against a temporary SQLite users table."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmpdir.name, "users.db")
+        conn = sqlite3.connect(self.db_name)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, age INTEGER)")
+        conn.executemany("INSERT INTO users VALUES (?, ?, ?)",
+                         [(i, f"user{i}", 20 + i % 30) for i in range(1, 101)])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def count(self):
+        conn = sqlite3.connect(self.db_name)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_execute_query_stream(self):
+        """Stream mode yields the same rows as fetchall, as records."""
+        query = "SELECT id, name FROM users WHERE age > ?"
+        with execute.ExecuteQuery(self.db_name, query, (25,)) as rows:
+            expected = rows
+        with execute.ExecuteQuery(self.db_name, query, (25,), stream=True,
+                                  arraysize=7, records=True) as rows:
+            streamed = list(rows)
+        self.assertEqual([tuple(r) for r in streamed], expected)
+        self.assertEqual(streamed[0].name, expected[0][1])
+
+    def assert_closed(self, manager):
+        with self.assertRaises(sqlite3.ProgrammingError):
+            manager.cursor.execute("SELECT 1")
+        with self.assertRaises(sqlite3.ProgrammingError):
+            manager.conn.execute("SELECT 1")
+
+    def test_stream_early_break_cleans_up(self):
+        """Breaking out of a stream still closes the cursor and connection."""
+        manager = execute.ExecuteQuery(self.db_name, "SELECT id FROM users", stream=True,
+                                       arraysize=10)
+        with manager as rows:
+            for row in rows:
+                break
+        self.assertEqual(row, (1,))
+        self.assertEqual(manager.results.gi_frame, None)  # iterator finished
+        self.assert_closed(manager)
+
+    def test_stream_error_in_body_rolls_back(self):
+        """An exception in the body rolls back and closes, stream mode included."""
+        manager = execute.ExecuteQuery(self.db_name, "SELECT id FROM users", stream=True,
+                                       arraysize=10)
+        with self.assertRaises(RuntimeError):
+            with manager as rows:
+                next(rows)
+                manager.conn.execute("DELETE FROM users")
+                raise RuntimeError("body failed")
+        self.assert_closed(manager)
+        self.assertEqual(self.count(), 100)
+
+    def test_lookup(self):
+        """IN (?) lookups run in padded batches, whatever the spacing."""
+        for query in ("SELECT id FROM users WHERE id IN (?) ORDER BY id",
+                      "SELECT id FROM users WHERE id in(?) ORDER BY id",
+                      "SELECT id FROM users WHERE id IN ( ? ) ORDER BY id"):
+            runner = execute.ExecuteMany(self.db_name, query, range(1, 24), batch_size=10)
+            with runner as rows:
+                self.assertEqual(sorted(set(r[0] for r in rows)), list(range(1, 24)))
+            self.assertEqual(runner.latency_report()["batches"], 3)
+
+    def test_executemany(self):
+        """Tuples are inserted in batches and the total rowcount returned."""
+        rows = [(i, f"new{i}", 30) for i in range(101, 351)]
+        with execute.ExecuteMany(self.db_name, "INSERT INTO users VALUES (?, ?, ?)",
+                                 rows, batch_size=100) as inserted:
+            self.assertEqual(inserted, 250)
+        self.assertEqual(self.count(), 350)
+
+    def test_borrowed_conn_keeps_callers_transaction(self):
+        """On a borrowed connection with pending writes, the caller decides."""
+        conn = sqlite3.connect(self.db_name)
+        try:
+            conn.execute("DELETE FROM users WHERE id = 1")  # caller's pending write
+            rows = [(i, f"new{i}", 30) for i in range(101, 111)]
+            with execute.ExecuteMany(self.db_name, "INSERT INTO users VALUES (?, ?, ?)",
+                                     rows, conn=conn) as inserted:
+                self.assertEqual(inserted, 10)
+            self.assertTrue(conn.in_transaction)  # not committed behind the caller's back
+            self.assertEqual(self.count(), 100)
+            conn.rollback()
+            self.assertEqual(self.count(), 100)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM users").fetchone()[0], 100)
+        finally:
+            conn.close()
+
+    def test_failed_batch_keeps_callers_pending_writes(self):
+        """A failing batch undoes only its own writes on a borrowed connection."""
+        conn = sqlite3.connect(self.db_name)
+        try:
+            conn.execute("DELETE FROM users WHERE id = 1")
+            rows = [(i, f"new{i}", 30) for i in range(101, 201)] + [(2, "dup", 30)]
+            with self.assertRaises(sqlite3.IntegrityError):
+                with execute.ExecuteMany(self.db_name, "INSERT INTO users VALUES (?, ?, ?)",
+                                         rows, batch_size=100, conn=conn):
+                    pass
+            self.assertTrue(conn.in_transaction)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM users").fetchone()[0], 99)
+            conn.commit()
+            self.assertEqual(self.count(), 99)
+        finally:
+            conn.close()
+
+    def test_failed_batch_rolls_back_borrowed_conn(self):
+        """A failing batch leaves no uncommitted writes on a borrowed connection."""
+        rows = [(i, f"new{i}", 30) for i in range(101, 201)] + [(1, "dup", 30)]
+        conn = sqlite3.connect(self.db_name)
+        try:
+            with self.assertRaises(sqlite3.IntegrityError):
+                with execute.ExecuteMany(self.db_name, "INSERT INTO users VALUES (?, ?, ?)",
+                                         rows, batch_size=100, conn=conn):
+                    self.fail("body must not run")
+            self.assertFalse(conn.in_transaction)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM users").fetchone()[0], 100)
+        finally:
+            conn.close()
+
+    def test_failed_batch_closes_owned_conn(self):
+        """A failing batch closes the connection ExecuteMany opened."""
+        rows = [(1, "dup", 30)]
+        runner = execute.ExecuteMany(self.db_name, "INSERT INTO users VALUES (?, ?, ?)", rows)
+        with self.assertRaises(sqlite3.IntegrityError):
+            with runner:
+                pass
+        with self.assertRaises(sqlite3.ProgrammingError):
+            runner.conn.execute("SELECT 1")
+        self.assertEqual(self.count(), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,16 +1,33 @@
 #!/usr/bin/env python3
 import sqlite3
 import functools
-from datetime import datetime   # ✅ required for timestamp logging
+import time
+import query_log   # timing, sampling, histograms and the background JSON-lines writer
+
+def log_queries(func=None, *, sample_rate=None, slow_ms=None):
+    """Decorator that times SQL queries and logs them off the hot path"""
+    if func is None:
+        return lambda f: log_queries(f, sample_rate=sample_rate, slow_ms=slow_ms)
 
-def log_queries(func):
-    """Decorator that logs SQL queries before executing them"""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # assume first argument is always the query
+        # assume first argument is always the query, bind params (if any) the second
         query = args[0] if args else kwargs.get("query", "")
-        print(f"[{datetime.now()}] Executing SQL Query: {query}")  # ✅ logs with timestamp
-        return func(*args, **kwargs)
+        params = kwargs.get("params") or (args[1] if len(args) > 1 else None)
+        result = None
+        error = None
+        start = time.perf_counter_ns()
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            rows = len(result) if isinstance(result, (list, tuple)) else None
+            query_log.record(query, params, time.perf_counter_ns() - start,
+                             rows=rows, error=error,
+                             sample_rate=sample_rate, slow_ms=slow_ms)
     return wrapper
 
 @log_queries
@@ -1,17 +1,14 @@
 #!/usr/bin/env python3
-import sqlite3
 import functools
+import db_pool
 
 def with_db_connection(func):
-    """Decorator that opens and closes a database connection automatically"""
+    """Decorator that lends the function a pooled database connection"""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect("users.db")   # ✅ open connection
-        try:
-            # Pass the connection as the first argument
+        # Pass the connection as the first argument; it goes back to the pool afterwards
+        with db_pool.get_pool("users.db").connection() as conn:
             return func(conn, *args, **kwargs)
-        finally:
-            conn.close()  # ✅ always close connection
     return wrapper
 
 @with_db_connection
@@ -1,19 +1,53 @@
 #!/usr/bin/env python3
 import sqlite3
 import functools
+import db_pool
+import sql_cache
 
 def with_db_connection(func):
-    """Decorator that opens and closes a database connection automatically"""
+    """Decorator that lends the function a pooled database connection"""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect("users.db")   # open DB
-        try:
+        # Pass the connection as the first argument; it goes back to the pool afterwards
+        with db_pool.get_pool("users.db").connection() as conn:
             return func(conn, *args, **kwargs)
-        finally:
-            conn.close()  # always close DB
     return wrapper
 
+_WRITE_ACTIONS = {sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE}
+
+
 def transactional(func):
     """Decorator that wraps a function in a transaction"""
     @functools.wraps(func)
-    de
+    def wrapper(conn, *args, **kwargs):
+        # Record which tables the transaction writes so cached reads of them
+        # can be dropped once it commits
+        written = set()
+
+        def authorizer(action, arg1, arg2, db_name, trigger):
+            if action in _WRITE_ACTIONS:
+                written.add(arg1)
+            return sqlite3.SQLITE_OK
+
+        conn.set_authorizer(authorizer)
+        try:
+            result = func(conn, *args, **kwargs)
+            conn.commit()    # commit if no error
+            sql_cache.invalidate_tables(written)
+            return result
+        except Exception:
+            conn.rollback()  # rollback on error
+            raise
+        finally:
+            conn.set_authorizer(None)
+    return wrapper
+
+@with_db_connection
+@transactional
+def update_user_email(conn, user_id, new_email):
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+#### Update user's email with automatic transaction handling
+if __name__ == "__main__":
+    update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
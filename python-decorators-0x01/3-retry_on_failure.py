@@ -1,18 +1,42 @@
 #!/usr/bin/env python3
-import time
-import sqlite3 
 import functools
+import db_pool
+import resilience
 
 def with_db_connection(func):
-    """Decorator that opens and closes a database connection automatically"""
+    """Decorator that lends the function a pooled database connection"""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect("users.db")
-        try:
+        # Pass the connection as the first argument; it goes back to the pool afterwards
+        with db_pool.get_pool("users.db").connection() as conn:
             return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
     return wrapper
 
-def retry_on_failure(retries=3, delay=1):
-    """Decorator
+def retry_on_failure(retries=3, delay=1, max_delay=30, deadline=None,
+                     retryable=resilience.is_retryable, breaker=None):
+    """
+    Decorator that retries the function on transient errors ("database is
+    locked", pool timeouts, ...) with exponential backoff and full jitter,
+    starting from `delay` seconds. Other errors are raised immediately.
+    `retries` is the total number of attempts, as it always was here (so
+    the policy gets retries - 1 retries after the first attempt).
+    Works on plain and async functions; metrics are on wrapper.policy.stats.
+    """
+    policy = resilience.RetryPolicy(retries=max(retries - 1, 0), base_delay=delay,
+                                    max_delay=max_delay, deadline=deadline,
+                                    retryable=retryable, breaker=breaker)
+    return resilience.retry(policy)
+
+# Retry outermost so each attempt checks out a connection of its own and a
+# PoolTimeout while waiting for one is retried too
+@retry_on_failure(retries=3, delay=1)
+@with_db_connection
+def fetch_users_with_retry(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users")
+    return cursor.fetchall()
+
+#### Attempt to fetch users with automatic retry on failure
+if __name__ == "__main__":
+    users = fetch_users_with_retry()
+    print(users)
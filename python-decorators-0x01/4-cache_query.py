@@ -1,26 +1,95 @@
 #!/usr/bin/env python3
-import time
-import sqlite3
 import functools
+import logging
+import threading
+import db_pool
+import sql_cache
+from single_flight import SingleFlight
 
-query_cache = {}
+# Entries are fresh for 60s, then served stale for up to 30s more while one
+# background refresh reloads them
+query_cache = sql_cache.QueryCache(max_entries=1024, max_bytes=64 * 1024 * 1024,
+                                   default_ttl=60, stale_ttl=30)
+flights = SingleFlight()
+logger = logging.getLogger("cache_query")
 
 def with_db_connection(func):
-    """Decorator that opens and closes a database connection automatically"""
+    """Decorator that lends the function a pooled database connection"""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect("users.db")
-        try:
+        # Pass the connection as the first argument; it goes back to the pool afterwards
+        with db_pool.get_pool("users.db").connection() as conn:
             return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
     return wrapper
 
-def cache_query(func):
+def database_of(conn):
+    """File path of conn's main database, or None if it is in-memory/temporary."""
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == "main":
+            return path or None
+    return None
+
+def _refresh(key, database, load):
+    """Background refresh on a pooled connection to the caller's database."""
+    def reload():
+        with db_pool.get_pool(database).connection() as conn:
+            return load(conn)
+    try:
+        flights.do(key, reload)
+    except Exception:
+        # Nobody awaits this thread; the stale entry simply expires later
+        logger.exception("background refresh of %r failed", key[0])
+
+def cache_query(func=None, *, ttl=None):
     """Decorator that caches query results to avoid redundant DB calls"""
+    if func is None:
+        return lambda f: cache_query(f, ttl=ttl)
+
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
-        # Assume the query is always passed as a kwarg or 1st positional arg
+        # Assume the query is always passed as a kwarg or 1st positional arg,
+        # and bind parameters (if any) as the "params" kwarg or 2nd positional arg
         query = kwargs.get("query") or (args[0] if args else None)
+        params = kwargs.get("params") or (args[1] if len(args) > 1 else None)
+
+        def load(conn):
+            # Taken before reading so rows older than a concurrent commit's
+            # invalidation are returned but not cached
+            generation = query_cache.generation(query)
+            result = func(conn, *args, **kwargs)
+            query_cache.store(query, params, result, ttl=ttl, generation=generation)
+            return result
+
+        key = query_cache.make_key(query, params)
+        state, result = query_cache.peek(query, params)
+        if state == sql_cache.FRESH:
+            print("Using cached result")
+            return result
+        if state == sql_cache.STALE:
+            database = database_of(conn)
+            if database is None:
+                # Only this connection can see an in-memory database: refresh inline
+                return flights.do(key, lambda: load(conn))
+            # Serve the stale rows now; one thread refreshes from the same database
+            if not flights.in_flight(key):
+                threading.Thread(target=_refresh, args=(key, database, load),
+                                 daemon=True).start()
+            return result
+
+        # Miss: concurrent callers for the same key share one execution
+        return flights.do(key, lambda: load(conn))
+    return wrapper
+
+@with_db_connection
+@cache_query
+def fetch_users_with_cache(conn, query):
+    cursor = conn.cursor()
+    cursor.execute(query)
+    return cursor.fetchall()
+
+#### First call will cache the result
+if __name__ == "__main__":
+    users = fetch_users_with_cache(query="SELECT * FROM users")
 
-        if query in query_cache:
+    #### Second call will use the cached result
+    users_again = fetch_users_with_cache(query="SELECT * FROM users")
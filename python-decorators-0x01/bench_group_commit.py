@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Updates/s: per-call @transactional vs GroupCommitWriter.
+
+Runs against a scratch copy of users.db so the real file is left untouched.
+Usage: bench_group_commit.py [users.db] [threads] [updates per thread]
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import db_pool
+from group_commit import GroupCommitWriter
+
+transactional = __import__('2-transactional').transactional
+
+UPDATE = "UPDATE users SET email = ? WHERE id = ?"
+
+
+@transactional
+def update_email(conn, user_id, email):
+    conn.execute(UPDATE, (email, user_id))
+
+
+def run_threads(threads, per_thread, work):
+    def worker(n):
+        for i in range(per_thread):
+            work(n, i)
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return threads * per_thread / (time.perf_counter() - start)
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "users.db"
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    per_thread = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    scratch = tempfile.mkdtemp()
+    path = os.path.join(scratch, "users.db")
+    shutil.copy(source, path)
+    ids = [row[0] for row in sqlite3.connect(path).execute("SELECT id FROM users")]
+    try:
+        pool = db_pool.ConnectionPool(path, size=threads)
+
+        def per_call(n, i):
+            with pool.connection() as conn:
+                update_email(conn, ids[(n + i) % len(ids)], f"user{n}-{i}@example.com")
+
+        per_call_rate = run_threads(threads, per_thread, per_call)
+        pool.close()
+
+        with GroupCommitWriter(path) as writer:
+            def grouped(n, i):
+                writer.write(UPDATE, (f"user{n}-{i}@example.com", ids[(n + i) % len(ids)]))
+
+            grouped_rate = run_threads(threads, per_thread, grouped)
+            commits = writer.stats["commits"]
+
+        print(f"threads={threads} updates={threads * per_thread}")
+        print(f"per-call transactional: {per_call_rate:>10,.0f} updates/s")
+        print(f"group commit:           {grouped_rate:>10,.0f} updates/s ({commits} commits)")
+    finally:
+        shutil.rmtree(scratch)
+
+
+if __name__ == "__main__":
+    main()
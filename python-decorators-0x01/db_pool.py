@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+SQLite connection pool shared by the with_db_connection decorators.
+
+Connections are opened with check_same_thread=False so any thread may use
+them, but each thread is handed back the connection it used last when that
+one is idle (thread affinity keeps SQLite's per-connection page cache warm).
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the checkout timeout."""
+
+
+class PoolClosed(Exception):
+    """The pool has been closed."""
+
+
+class ConnectionPool:
+    """Bounded pool of sqlite3 connections to a single database file"""
+
+    def __init__(self, database, size=5, idle_timeout=300.0, checkout_timeout=30.0):
+        self.database = database
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._idle = {}         # connection -> time it was returned
+        self._open = 0          # idle + checked out
+        self.closed = False
+        self._lock = threading.Condition()
+        self._local = threading.local()
+        self.stats = {
+            "checkouts": 0,     # successful checkouts
+            "hits": 0,          # served by an already open connection
+            "affinity_hits": 0, # ... that was this thread's previous one
+            "waits": 0,         # checkouts that had to block
+            "created": 0,
+            "discarded": 0,     # failed health check, idle timeout or broken on release
+        }
+
+    # -- checkout / checkin -------------------------------------------------
+    def acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._lock:
+            self._evict_idle()
+            waited = False
+            while True:
+                if self.closed:
+                    raise PoolClosed(f"pool for {self.database} is closed")
+                if self._idle or self._open < self.size:
+                    break
+                waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._lock.wait(remaining):
+                    raise PoolTimeout(f"no connection to {self.database} "
+                                      f"within {self.checkout_timeout}s")
+            if waited:
+                self.stats["waits"] += 1
+            conn = self._take_idle()
+            if conn is None:
+                self._open += 1
+
+        if conn is not None and not self._healthy(conn):
+            self._discard(conn, reopen_slot=True)
+            conn = None
+        if conn is None:
+            try:
+                conn = sqlite3.connect(self.database, check_same_thread=False)
+            except Exception:
+                with self._lock:
+                    self._open -= 1
+                    self._lock.notify()
+                raise
+            with self._lock:
+                self.stats["created"] += 1
+        else:
+            with self._lock:
+                self.stats["hits"] += 1
+
+        with self._lock:
+            self.stats["checkouts"] += 1
+        self._local.last = conn
+        return conn
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # never hand uncommitted work to the next caller
+        except sqlite3.Error:
+            self._discard(conn)  # broken connection: free its slot instead
+            raise
+        with self._lock:
+            if not self.closed:
+                self._idle[conn] = time.monotonic()
+                self._lock.notify()
+                return
+        self._discard(conn)  # checked out when the pool was closed
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    # -- housekeeping -------------------------------------------------------
+    def _take_idle(self):
+        """Pop this thread's previous connection if idle, else any idle one."""
+        if not self._idle:
+            return None
+        preferred = getattr(self._local, "last", None)
+        if preferred in self._idle:
+            del self._idle[preferred]
+            self.stats["affinity_hits"] += 1
+            return preferred
+        conn = next(iter(self._idle))
+        del self._idle[conn]
+        return conn
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        for conn, returned in list(self._idle.items()):
+            if returned < cutoff:
+                del self._idle[conn]
+                self._open -= 1
+                self.stats["discarded"] += 1
+                conn.close()
+
+    @staticmethod
+    def _healthy(conn):
+        try:
+            conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn, reopen_slot=False):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self.stats["discarded"] += 1
+            if not reopen_slot:
+                self._open -= 1
+                self._lock.notify()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+        stats["hit_rate"] = stats["hits"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+    def close(self):
+        """Close idle connections; checked-out ones are closed on release."""
+        with self._lock:
+            self.closed = True
+            self._lock.notify_all()  # waiters re-check and raise PoolClosed
+            for conn in self._idle:
+                conn.close()
+            self._open -= len(self._idle)
+            self._idle.clear()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database="users.db", **options):
+    """Process-wide pool for `database`; options only apply on first call."""
+    with _pools_lock:
+        pool = _pools.get(database)
+        if pool is None or pool.closed:
+            pool = _pools[database] = ConnectionPool(database, **options)
+        return pool
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Group commit for small writes.
+
+Callers on any thread submit single statements and get a Future back. One
+writer thread gathers whatever arrives within max_delay_ms (or up to
+max_batch statements) into a single transaction, so N small updates share
+one commit / fsync instead of paying for one each. Each statement runs in
+its own savepoint: a failing statement fails only its own future.
+
+Once the writer is closed, or its thread has died (connect failed, the
+connection broke mid-rollback), submit() raises WriterClosedError and every
+write still queued fails with it, so no caller waits on a Future forever.
+"""
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import sql_cache
+
+_WRITE_ACTIONS = {sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE}
+_STOP = object()
+
+
+class WriterClosedError(Exception):
+    """The group-commit writer is closed or its thread has stopped."""
+
+
+class GroupCommitWriter:
+    """Background writer that batches statements into shared transactions"""
+
+    def __init__(self, database="users.db", max_batch=256, max_delay_ms=5.0):
+        self.database = database
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue = queue.Queue()
+        self._written = set()
+        self._closed = False
+        self._lock = threading.Lock()  # orders submit() against shutdown
+        self.stats = {"writes": 0, "commits": 0, "failed_writes": 0}
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, params=()):
+        """Queue a write; the Future resolves to its rowcount once committed."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise WriterClosedError("group-commit writer is closed")
+            self._queue.put((sql, params, future))
+        return future
+
+    def write(self, sql, params=()):
+        """Blocking submit: returns the rowcount after the batch commits."""
+        return self.submit(sql, params).result()
+
+    def close(self):
+        """Flush pending writes and stop the writer thread."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    # -- writer thread ------------------------------------------------------
+    def _authorize(self, action, arg1, arg2, db_name, trigger):
+        if action in _WRITE_ACTIONS:
+            self._written.add(arg1)
+        return sqlite3.SQLITE_OK
+
+    def _run(self):
+        conn = None
+        batch = []
+        try:
+            conn = sqlite3.connect(self.database, isolation_level=None)
+            conn.set_authorizer(self._authorize)
+            while True:
+                batch, stop = self._collect()
+                if batch:
+                    self._commit(conn, batch)
+                batch = []
+                if stop:
+                    return
+        finally:
+            if conn is not None:
+                conn.close()
+            self._fail_pending(batch)
+
+    def _fail_pending(self, batch):
+        """Refuse new writes and fail any the thread will never commit."""
+        with self._lock:
+            self._closed = True
+        cause = sys.exc_info()[1]
+        pending = list(batch)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                pending.append(item)
+        for _, _, future in pending:
+            if not future.done():
+                error = WriterClosedError("group-commit writer stopped before committing")
+                error.__cause__ = cause
+                future.set_exception(error)
+
+    def _collect(self):
+        """Block for the first write, then gather more until full or timed out."""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _commit(self, conn, batch):
+        done = []
+        self._written.clear()
+        try:
+            conn.execute("BEGIN")
+            for sql, params, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write")
+                try:
+                    rowcount = conn.execute(sql, params).rowcount
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    self.stats["failed_writes"] += 1
+                    future.set_exception(e)
+                else:
+                    conn.execute("RELEASE write")
+                    done.append((future, rowcount))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # The transaction broke partway (a statement ended it, SAVEPOINT or
+            # COMMIT failed): every write in the batch not yet failed fails now,
+            # including the one in flight and those never started
+            rollback_error = None
+            if conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK")
+                except Exception as err:
+                    rollback_error = err
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+                    self.stats["failed_writes"] += 1
+            if rollback_error is not None:
+                raise rollback_error  # connection unusable; _run fails what's queued
+            return
+
+        self.stats["commits"] += 1
+        self.stats["writes"] += len(done)
+        sql_cache.invalidate_tables(self._written)
+        for future, rowcount in done:
+            future.set_result(rowcount)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Query instrumentation used by log_queries.
+
+Every call is timed with a monotonic clock and added to a per-query latency
+histogram (queries are normalized so literals and IN-list lengths don't
+split them, and past MAX_HISTOGRAMS distinct queries the rest share one
+overflow histogram, so memory stays bounded). A sampled
+subset of calls, plus every slow or failed one, is emitted as a JSON line
+through a bounded queue; a background listener thread does the formatting
+and I/O, so the query path never blocks on stdout or disk.
+"""
+import atexit
+import functools
+import hashlib
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+import sql_cache
+
+SAMPLE_RATE = 1.0     # fraction of ordinary queries that are logged
+SLOW_MS = 100.0       # queries at least this slow are always logged
+QUEUE_SIZE = 10_000   # pending log records before new ones are dropped
+MAX_HISTOGRAMS = 1000  # distinct normalized queries tracked individually
+OVERFLOW_KEY = "<other>"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize(sql):
+    """SQL with literals replaced by ? and IN lists collapsed to IN (...)."""
+    sql = _STRING_LITERAL.sub("?", sql_cache.normalize_sql(sql))
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+def fingerprint(params):
+    """Short stable hash of bind parameters; the values themselves are never logged."""
+    if not params:
+        return None
+    return hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+
+
+class LatencyHistogram:
+    """Power-of-two microsecond buckets; enough for p50/p90/p99 estimates"""
+
+    __slots__ = ("buckets", "count", "total_us", "max_us")
+
+    def __init__(self):
+        self.buckets = [0] * 32
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def add(self, duration_us):
+        self.buckets[min(int(duration_us).bit_length(), 31)] += 1
+        self.count += 1
+        self.total_us += duration_us
+        if duration_us > self.max_us:
+            self.max_us = duration_us
+
+    def percentile(self, p):
+        """Upper bound (µs) of the bucket holding the p-th percentile."""
+        if not self.count:
+            return None
+        target = p * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(1 << i, self.max_us)
+        return self.max_us
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_us": self.total_us / self.count if self.count else None,
+            "p50_us": self.percentile(0.5),
+            "p90_us": self.percentile(0.9),
+            "p99_us": self.percentile(0.99),
+            "max_us": self.max_us,
+        }
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full"""
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record  # formatting happens on the listener thread
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.query_event, default=str)
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+logger = logging.getLogger("query_log")
+logger.propagate = False
+logger.setLevel(logging.INFO)
+_handler = None
+_listener = None
+_config_lock = threading.RLock()  # configure() may run lazily on any thread
+
+
+def configure(stream=None, path=None, sample_rate=None, slow_ms=None):
+    """(Re)start the background writer to a stream (stdout by default) or a file."""
+    global _handler, _listener, SAMPLE_RATE, SLOW_MS
+    with _config_lock:
+        if sample_rate is not None:
+            SAMPLE_RATE = sample_rate
+        if slow_ms is not None:
+            SLOW_MS = slow_ms
+        shutdown()
+        target = logging.FileHandler(path) if path else logging.StreamHandler(stream or sys.stdout)
+        target.setFormatter(JsonLinesFormatter())
+        _handler = DroppingQueueHandler(queue.Queue(QUEUE_SIZE))
+        _listener = QueueListener(_handler.queue, target)
+        _listener.start()
+        logger.addHandler(_handler)
+
+
+def shutdown():
+    """Flush pending records and stop the background writer."""
+    global _handler, _listener
+    with _config_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            logger.removeHandler(_handler)
+        _handler = _listener = None
+
+
+atexit.register(shutdown)
+
+
+def record(sql, params, duration_ns, rows=None, error=None, sample_rate=None, slow_ms=None):
+    """Account one executed query; emit a log line if sampled, slow or failed."""
+    normalized = normalize(sql)
+    duration_us = duration_ns // 1000
+    with _histograms_lock:
+        histogram = _histograms.get(normalized)
+        if histogram is None:
+            key = normalized if len(_histograms) < MAX_HISTOGRAMS else OVERFLOW_KEY
+            histogram = _histograms.get(key)
+            if histogram is None:
+                histogram = _histograms[key] = LatencyHistogram()
+        histogram.add(duration_us)
+
+    sample_rate = SAMPLE_RATE if sample_rate is None else sample_rate
+    slow_ms = SLOW_MS if slow_ms is None else slow_ms
+    duration_ms = duration_ns / 1e6
+    slow = duration_ms >= slow_ms
+    if not (slow or error is not None or random.random() < sample_rate):
+        return
+
+    if _listener is None:
+        with _config_lock:
+            if _listener is None:  # another thread may have just configured it
+                configure()
+    event = {
+        "ts": time.time(),
+        "query": normalized,
+        "params": fingerprint(params),
+        "duration_ms": round(duration_ms, 3),
+        "rows": rows,
+        "slow": slow,
+        "error": repr(error) if error is not None else None,
+    }
+    logger.log(logging.WARNING if slow or error else logging.INFO, "",
+               extra={"query_event": event})
+
+
+def histograms():
+    """{normalized query: latency summary} for every query seen so far."""
+    with _histograms_lock:
+        return {sql: h.summary() for sql, h in _histograms.items()}
+
+
+def dropped():
+    return _handler.dropped if _handler is not None else 0
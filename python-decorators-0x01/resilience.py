@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Retry policy and circuit breaker for database calls.
+
+Only errors classified as transient are retried, with exponential backoff and
+full jitter (so callers that failed together don't retry in lockstep) inside
+an overall deadline. A circuit breaker fails fast once the recent transient
+error rate crosses a threshold, and lets a single trial call through after a
+cool-down.
+"""
+import asyncio
+import functools
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from db_pool import PoolTimeout
+
+_TRANSIENT_MESSAGES = ("database is locked", "database is busy", "disk i/o error")
+
+
+class CircuitOpenError(Exception):
+    """The circuit breaker is open; the call was not attempted."""
+
+
+def is_retryable(error):
+    """Default classifier: lock/busy contention and connection-level failures."""
+    if isinstance(error, sqlite3.OperationalError):
+        message = str(error).lower()
+        return any(m in message for m in _TRANSIENT_MESSAGES)
+    return isinstance(error, (PoolTimeout, TimeoutError, ConnectionError))
+
+
+class CircuitBreaker:
+    """Error-rate breaker over the last `window` calls: closed -> open -> half-open"""
+
+    def __init__(self, failure_rate=0.5, window=20, min_calls=10, reset_timeout=30.0):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self._outcomes = deque(maxlen=window)  # True = failure
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.stats = {"short_circuited": 0, "opened": 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError; True if it is the half-open trial."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return False
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.stats["short_circuited"] += 1
+        raise CircuitOpenError("circuit open: recent database error rate too high")
+
+    def record(self, failed, trial=False):
+        with self._lock:
+            if trial:
+                # Outcome of the half-open trial decides whether to close again
+                self._trial_running = False
+                if failed:
+                    self._opened_at = time.monotonic()
+                else:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                return
+            if self._opened_at is not None:
+                return  # admitted before the breaker opened; already decided
+            self._outcomes.append(failed)
+            calls = len(self._outcomes)
+            if calls >= self.min_calls and sum(self._outcomes) / calls >= self.failure_rate:
+                self._opened_at = time.monotonic()
+                self.stats["opened"] += 1
+
+    def abandon(self, trial):
+        """A call ended without an outcome (cancelled, interrupted); free its trial slot."""
+        if trial:
+            with self._lock:
+                self._trial_running = False
+
+
+class RetryPolicy:
+    """Backoff schedule, classification and metrics shared by sync and async retry"""
+
+    def __init__(self, retries=3, base_delay=0.05, max_delay=2.0, deadline=None,
+                 retryable=is_retryable, breaker=None):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retryable = retryable
+        self.breaker = breaker
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0,
+                      "wait_seconds": 0.0}
+
+    def backoff(self, attempt):
+        """Full jitter: uniform in [0, min(max_delay, base_delay * 2**attempt)]."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _before_attempt(self):
+        trial = self.breaker.before_call() if self.breaker is not None else False
+        self._count("attempts")
+        return trial
+
+    def _after_attempt(self, error, trial):
+        try:
+            transient = error is not None and self.retryable(error)
+        except BaseException:
+            self._abandon_attempt(trial)
+            raise
+        if self.breaker is not None:
+            # Fatal errors mean the database answered; only transient ones trip it
+            self.breaker.record(failed=transient, trial=trial)
+        return transient
+
+    def _abandon_attempt(self, trial):
+        if self.breaker is not None:
+            self.breaker.abandon(trial)
+
+    def _next_wait(self, attempt, started):
+        """Seconds to wait before the next attempt, or None to give up."""
+        if attempt >= self.retries:
+            return None
+        wait = self.backoff(attempt)
+        if self.deadline is not None and time.monotonic() - started + wait > self.deadline:
+            return None
+        self._count("retries")
+        self._count("wait_seconds", wait)
+        return wait
+
+    def call(self, func, *args, **kwargs):
+        self._count("calls")
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            trial = self._before_attempt()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                transient = self._after_attempt(e, trial)
+                wait = self._next_wait(attempt, started) if transient else None
+                if wait is None:
+                    self._count("failures")
+                    raise
+                time.sleep(wait)
+                attempt += 1
+            except BaseException:
+                # Cancelled or interrupted: no outcome, but the trial slot must go
+                self._abandon_attempt(trial)
+                raise
+            else:
+                self._after_attempt(None, trial)
+                return result
+
+    async def call_async(self, func, *args, **kwargs):
+        self._count("calls")
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            trial = self._before_attempt()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                transient = self._after_attempt(e, trial)
+                wait = self._next_wait(attempt, started) if transient else None
+                if wait is None:
+                    self._count("failures")
+                    raise
+                await asyncio.sleep(wait)
+                attempt += 1
+            except BaseException:
+                # Cancelled or interrupted: no outcome, but the trial slot must go
+                self._abandon_attempt(trial)
+                raise
+            else:
+                self._after_attempt(None, trial)
+                return result
+
+
+def retry(policy):
+    """Decorator running a function (sync or async) under `policy`"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await policy.call_async(func, *args, **kwargs)
+            async_wrapper.policy = policy
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return policy.call(func, *args, **kwargs)
+        wrapper.policy = policy
+        return wrapper
+    return decorator
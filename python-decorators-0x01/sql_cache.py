@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Bounded query-result cache used by cache_query.
+
+Entries are keyed on normalized SQL plus bind parameters, evicted LRU-first
+once either the entry count or the estimated byte size goes over budget,
+expire after a per-entry TTL (optionally followed by a stale window in which
+they may still be served while a refresh runs), and are dropped when a write
+to one of the tables they read from is committed (see invalidate_tables /
+transactional).
+
+Every invalidation also bumps a per-table version. A loader takes
+generation(sql) before running the query and hands it to store(), which
+refuses the result if any of its tables was invalidated in between; rows
+read before a commit can't be cached after that commit's invalidation.
+"""
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r"\s+")
+_TABLE_LIST = re.compile(r"\b(?:FROM|JOIN)\s+", re.IGNORECASE)
+# One entry of a FROM list: name, optional alias, and the comma (if any) that
+# continues the list, as in "FROM users u, orders AS o"
+_TABLE_ITEM = re.compile(
+    r"""[`"\[]?(\w+)[`"\]]?"""
+    r"(?:\s+(?:AS\s+)?(?!(?:WHERE|ON|USING|JOIN|INNER|LEFT|RIGHT|CROSS|NATURAL"
+    r"|GROUP|ORDER|LIMIT|HAVING|UNION|WINDOW)\b)\w+)?\s*(,?)\s*",
+    re.IGNORECASE)
+
+_caches = weakref.WeakSet()
+
+FRESH, STALE, MISS = "fresh", "stale", "miss"
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and drop a trailing semicolon."""
+    return _WHITESPACE.sub(" ", sql).strip().rstrip(";").rstrip()
+
+
+def tables_in(sql):
+    """Lower-cased names of the tables a query reads from."""
+    names = set()
+    for ref in _TABLE_LIST.finditer(sql):
+        pos = ref.end()
+        while True:
+            item = _TABLE_ITEM.match(sql, pos)
+            if item is None:
+                break  # e.g. a subquery; its own FROM is matched separately
+            names.add(item.group(1).lower())
+            if not item.group(2):
+                break
+            pos = item.end()
+    return frozenset(names)
+
+
+def _freeze(params):
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    return tuple(params)
+
+
+def _sizeof(obj):
+    """Rough deep size of a query result (rows of scalars)."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        size += sum(_sizeof(item) for item in obj)
+    elif isinstance(obj, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in obj.items())
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "expires", "stale_until", "size", "tables")
+
+    def __init__(self, value, expires, stale_until, size, tables):
+        self.value = value
+        self.expires = expires
+        self.stale_until = stale_until
+        self.size = size
+        self.tables = tables
+
+
+class QueryCache:
+    """Thread-safe LRU + TTL cache of query results"""
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, default_ttl=60.0,
+                 stale_ttl=0.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._versions = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0,
+                      "expirations": 0, "invalidations": 0, "stale_stores": 0}
+        _caches.add(self)
+
+    @staticmethod
+    def make_key(sql, params=None):
+        return normalize_sql(sql), _freeze(params)
+
+    def lookup(self, sql, params=None):
+        """Return (True, result) on a fresh hit, (False, None) otherwise."""
+        state, value = self.peek(sql, params)
+        if state == FRESH:
+            return True, value
+        return False, None
+
+    def peek(self, sql, params=None):
+        """Return (FRESH | STALE | MISS, result or None)."""
+        key = self.make_key(sql, params)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stale_until <= now:
+                self._remove(key)
+                self.stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return MISS, None
+            self._entries.move_to_end(key)
+            if entry.expires <= now:
+                self.stats["stale_hits"] += 1
+                return STALE, entry.value
+            self.stats["hits"] += 1
+            return FRESH, entry.value
+
+    def generation(self, sql):
+        """Versions of the tables `sql` reads from; pass to store()."""
+        tables = tables_in(normalize_sql(sql))
+        with self._lock:
+            return tuple(sorted((t, self._versions.get(t, 0)) for t in tables))
+
+    def store(self, sql, params, result, ttl=None, generation=None):
+        """
+        Cache `result`. With `generation` (from generation() before the
+        query ran), the result is dropped if its tables were invalidated since.
+        """
+        key = self.make_key(sql, params)
+        size = _sizeof(result)
+        if size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl
+        entry = _Entry(result, expires, expires + self.stale_ttl, size, tables_in(key[0]))
+        with self._lock:
+            if generation is not None and any(
+                    self._versions.get(table, 0) != version for table, version in generation):
+                self.stats["stale_stores"] += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            for table in entry.tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate_tables(self, tables):
+        """Drop every entry that reads from any of `tables`."""
+        with self._lock:
+            for table in tables:
+                table = table.lower()
+                self._versions[table] = self._versions.get(table, 0) + 1
+                for key in list(self._by_table.get(table, ())):
+                    self._remove(key)
+                    self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for table in entry.tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+def invalidate_tables(tables):
+    """Invalidate `tables` in every live QueryCache."""
+    if tables:
+        for cache in list(_caches):
+            cache.invalidate_tables(tables)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the cache_query decorator's miss and stale-while-revalidate paths.
+"""
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+cache_query_module = __import__('4-cache_query')
+
+
+@cache_query_module.cache_query
+def fetch(conn, query):
+    return conn.execute(query).fetchall()
+
+
+class TestCacheQuery(unittest.TestCase):
+    """Tests for cache_query against a database other than users.db."""
+
+    QUERY = "SELECT name FROM users ORDER BY id"
+
+    def setUp(self):
+        cache_query_module.query_cache.clear()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmpdir.name, "other.db")
+        self.conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        self.conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        self.conn.execute("INSERT INTO users VALUES (1, 'alice')")
+        self.conn.commit()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)  # a stray users.db would land here
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.conn.close()
+        cache_query_module.db_pool.get_pool(self.db_name).close()
+        cache_query_module.query_cache.clear()
+        self.tmpdir.cleanup()
+
+    def expire(self):
+        """Make every cached entry stale without waiting for its TTL."""
+        for entry in cache_query_module.query_cache._entries.values():
+            entry.expires = 0
+
+    def add_bob(self, conn):
+        conn.execute("INSERT INTO users VALUES (2, 'bob')")
+        conn.commit()
+
+    def test_hit_after_miss(self):
+        self.assertEqual(fetch(self.conn, query=self.QUERY), [("alice",)])
+        self.add_bob(sqlite3.connect(self.db_name))  # bypasses invalidation
+        self.assertEqual(fetch(self.conn, query=self.QUERY), [("alice",)])
+
+    def test_stale_served_then_refreshed_from_callers_database(self):
+        fetch(self.conn, query=self.QUERY)
+        other = sqlite3.connect(self.db_name)
+        self.add_bob(other)
+        other.close()
+        self.expire()
+
+        self.assertEqual(fetch(self.conn, query=self.QUERY), [("alice",)])
+        deadline = time.monotonic() + 5
+        rows = None
+        while time.monotonic() < deadline:
+            state, rows = cache_query_module.query_cache.peek(self.QUERY)
+            if state == "fresh":
+                break
+            time.sleep(0.01)
+        self.assertEqual(rows, [("alice",), ("bob",)])
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, "users.db")))
+
+    def test_in_memory_database_refreshes_inline(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("INSERT INTO users VALUES (1, 'alice')")
+        fetch(conn, query=self.QUERY)
+        conn.execute("INSERT INTO users VALUES (2, 'bob')")
+        self.expire()
+        self.assertEqual(fetch(conn, query=self.QUERY), [("alice",), ("bob",)])
+        conn.close()
+
+    def test_refresh_errors_are_logged(self):
+        fetch(self.conn, query=self.QUERY)
+        self.expire()
+        self.conn.execute("DROP TABLE users")
+        self.conn.commit()
+        with self.assertLogs("cache_query", level="ERROR") as logs:
+            fetch(self.conn, query=self.QUERY)  # stale rows, refresh fails
+            deadline = time.monotonic() + 5
+            while not logs.records and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite connection pool.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from db_pool import ConnectionPool, PoolClosed, PoolTimeout
+
+
+class BrokenConnection:
+    """Connection stand-in whose rollback fails, as after a lost file handle."""
+
+    in_transaction = True
+
+    def rollback(self):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    def close(self):
+        pass
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests for ConnectionPool against a temporary database."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmpdir.name, "users.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def pool(self, **options):
+        pool = ConnectionPool(self.db_name, **options)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_reuses_connections(self):
+        pool = self.pool(size=2)
+        for _ in range(5):
+            with pool.connection() as conn:
+                conn.execute("SELECT 1")
+        stats = pool.get_stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["hits"], 4)
+
+    def test_blocks_until_release(self):
+        pool = self.pool(size=1, checkout_timeout=5)
+        conn = pool.acquire()
+        threading.Timer(0.1, pool.release, args=(conn,)).start()
+        started = time.monotonic()
+        self.assertIs(pool.acquire(), conn)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(pool.get_stats()["waits"], 1)
+
+    def test_checkout_timeout(self):
+        pool = self.pool(size=1, checkout_timeout=0.05)
+        pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+    def test_unhealthy_connection_replaced(self):
+        pool = self.pool(size=1)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.close()  # health check on the next checkout fails
+        fresh = pool.acquire()
+        self.assertIsNot(fresh, conn)
+        self.assertEqual(fresh.execute("SELECT 1").fetchone(), (1,))
+        stats = pool.get_stats()
+        self.assertEqual((stats["discarded"], stats["open"]), (1, 1))
+
+    def test_idle_eviction(self):
+        pool = self.pool(size=2, idle_timeout=0.05)
+        with pool.connection():
+            pass
+        time.sleep(0.1)
+        with pool.connection():
+            pass
+        stats = pool.get_stats()
+        self.assertEqual((stats["created"], stats["discarded"], stats["open"]), (2, 1, 1))
+
+    def test_thread_affinity(self):
+        pool = self.pool(size=3)
+        other = pool.acquire()
+        mine = pool.acquire()  # the last one this thread checked out
+        pool.release(other)
+        pool.release(mine)
+        self.assertIs(pool.acquire(), mine)  # not `other`, the first idle one
+        self.assertEqual(pool.get_stats()["affinity_hits"], 1)
+
+    def test_broken_connection_frees_its_slot(self):
+        pool = self.pool(size=1, checkout_timeout=0.5)
+        pool.acquire()
+        with self.assertRaises(sqlite3.OperationalError):
+            pool.release(BrokenConnection())
+        with pool.connection() as conn:  # the slot is usable again
+            self.assertEqual(conn.execute("SELECT 1").fetchone(), (1,))
+        self.assertEqual(pool.get_stats()["open"], 1)
+
+    def test_close(self):
+        pool = self.pool(size=2)
+        idle = pool.acquire()
+        busy = pool.acquire()
+        pool.release(idle)
+        pool.close()
+        with self.assertRaises(PoolClosed):
+            pool.acquire()
+        pool.release(busy)  # closed instead of going back to the idle set
+        with self.assertRaises(sqlite3.ProgrammingError):
+            busy.execute("SELECT 1")
+        self.assertEqual(pool.get_stats()["open"], 0)
+
+    def test_close_wakes_waiters(self):
+        pool = self.pool(size=1, checkout_timeout=5)
+        pool.acquire()
+        threading.Timer(0.05, pool.close).start()
+        with self.assertRaises(PoolClosed):
+            pool.acquire()
+
+
+if __name__ == "__main__":
+    unittest.main()
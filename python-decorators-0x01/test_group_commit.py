@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the group-commit writer.
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import wait
+
+from group_commit import GroupCommitWriter, WriterClosedError
+
+
+class TestGroupCommitWriter(unittest.TestCase):
+    """Tests for GroupCommitWriter against a temporary database."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmpdir.name, "users.db")
+        conn = sqlite3.connect(self.db_name)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, age INTEGER)")
+        conn.executemany("INSERT INTO users VALUES (?, 20)", [(i,) for i in range(10)])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_batches_writes(self):
+        """Queued writes commit together; a bad one fails only its own future."""
+        with GroupCommitWriter(self.db_name, max_delay_ms=50) as writer:
+            futures = [writer.submit("UPDATE users SET age = age + 1 WHERE id = ?", (i,))
+                       for i in range(10)]
+            bad = writer.submit("INSERT INTO users VALUES (0, 1)")
+            wait(futures + [bad], timeout=5)
+        self.assertEqual([f.result() for f in futures], [1] * 10)
+        self.assertIsInstance(bad.exception(), sqlite3.IntegrityError)
+        self.assertLess(writer.stats["commits"], 10)
+
+        conn = sqlite3.connect(self.db_name)
+        self.assertEqual(conn.execute("SELECT SUM(age) FROM users").fetchone()[0], 210)
+        conn.close()
+
+    def test_submit_after_close(self):
+        """Writes submitted after close() are rejected, not left pending."""
+        writer = GroupCommitWriter(self.db_name)
+        writer.close()
+        with self.assertRaises(WriterClosedError):
+            writer.submit("UPDATE users SET age = 1")
+        writer.close()  # idempotent
+
+    def test_dead_writer_fails_pending(self):
+        """If the writer thread dies, queued and later writes fail promptly."""
+        writer = GroupCommitWriter(os.path.join(self.tmpdir.name, "missing", "x.db"))
+        writer._thread.join(5)
+        self.assertFalse(writer._thread.is_alive())
+        with self.assertRaises(WriterClosedError):
+            writer.write("UPDATE users SET age = 1")
+
+    def test_statement_breaking_transaction_fails_batch(self):
+        """A statement that ends the transaction fails the rest of its batch."""
+        writer = GroupCommitWriter(self.db_name, max_delay_ms=200)
+        futures = [writer.submit("UPDATE users SET age = 1 WHERE id = 1"),
+                   writer.submit("COMMIT"),
+                   writer.submit("UPDATE users SET age = 2 WHERE id = 2")]
+        wait(futures, timeout=5)
+        self.assertTrue(all(f.done() for f in futures))
+        self.assertIsInstance(futures[1].exception(), sqlite3.Error)
+        self.assertIsNotNone(futures[2].exception())
+        self.assertEqual(writer.write("UPDATE users SET age = 3 WHERE id = 3"), 1)
+        writer.close()
+
+    def test_broken_rollback_fails_batch(self):
+        """A batch whose ROLLBACK raises fails its futures instead of hanging."""
+        class BrokenWriter(GroupCommitWriter):
+            def _commit(self, conn, batch):
+                raise sqlite3.OperationalError("disk I/O error")  # as from ROLLBACK
+
+        writer = BrokenWriter(self.db_name)
+        future = writer.submit("UPDATE users SET age = 1 WHERE id = 1")
+        with self.assertRaises(WriterClosedError) as caught:
+            future.result(timeout=5)
+        self.assertIsInstance(caught.exception.__cause__, sqlite3.OperationalError)
+        writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for query instrumentation.
+"""
+import io
+import threading
+import unittest
+from unittest.mock import patch
+
+import query_log
+
+
+class TestQueryLog(unittest.TestCase):
+    """Tests for query_log normalization, histograms and lazy configuration."""
+
+    def setUp(self):
+        query_log.shutdown()
+        query_log._histograms.clear()
+
+    def tearDown(self):
+        query_log.shutdown()
+        query_log._histograms.clear()
+
+    def test_in_lists_share_a_histogram(self):
+        for n in range(1, 50):
+            ids = ", ".join(str(i) for i in range(n))
+            query_log.record(f"SELECT * FROM users WHERE id IN ({ids})", None, 1000,
+                             sample_rate=0)
+        self.assertEqual(list(query_log.histograms()),
+                         ["SELECT * FROM users WHERE id IN (...)"])
+
+    def test_histogram_count_is_bounded(self):
+        with patch.object(query_log, "MAX_HISTOGRAMS", 10):
+            for n in range(30):
+                query_log.record(f"SELECT * FROM t{n}", None, 1000, sample_rate=0)
+        summaries = query_log.histograms()
+        self.assertLessEqual(len(summaries), 11)
+        self.assertEqual(summaries[query_log.OVERFLOW_KEY]["count"], 20)
+
+    def test_concurrent_first_records_configure_once(self):
+        barrier = threading.Barrier(8)
+        configure = query_log.configure
+        calls = []
+
+        def counting_configure(*args, **kwargs):
+            calls.append(1)
+            configure(stream=io.StringIO())
+
+        def first_record():
+            barrier.wait()
+            query_log.record("SELECT 1", None, 1000, sample_rate=1)
+
+        with patch.object(query_log, "configure", counting_configure):
+            threads = [threading.Thread(target=first_record) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+        # Count only our handlers; pytest attaches its own capture handlers
+        ours = [h for h in query_log.logger.handlers
+                if isinstance(h, query_log.DroppingQueueHandler)]
+        self.assertEqual(ours, [query_log._handler])
+
+
+if __name__ == "__main__":
+    unittest.main()
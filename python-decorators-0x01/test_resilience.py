@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for the retry policy and circuit breaker.
+"""
+import asyncio
+import sqlite3
+import unittest
+
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+LOCKED = sqlite3.OperationalError("database is locked")
+
+
+def open_breaker():
+    """A breaker that opens after two failures and half-opens immediately."""
+    breaker = CircuitBreaker(failure_rate=0.5, window=4, min_calls=2, reset_timeout=0)
+    breaker.record(failed=True)
+    breaker.record(failed=True)
+    return breaker
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Tests for CircuitBreaker state transitions."""
+
+    def test_opens_on_error_rate(self):
+        """The breaker opens once the failure rate reaches the threshold."""
+        breaker = CircuitBreaker(failure_rate=0.5, window=4, min_calls=4,
+                                 reset_timeout=60)
+        for failed in (False, True, False):
+            breaker.record(failed=failed)
+        self.assertEqual(breaker.state, "closed")
+        breaker.record(failed=True)
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_single_trial_when_half_open(self):
+        """Only one call is admitted while half-open."""
+        breaker = open_breaker()
+        self.assertEqual(breaker.state, "half-open")
+        self.assertTrue(breaker.before_call())
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_trial_outcome(self):
+        """A successful trial closes the breaker, a failed one reopens it."""
+        breaker = open_breaker()
+        breaker.record(failed=False, trial=breaker.before_call())
+        self.assertEqual(breaker.state, "closed")
+
+        breaker = open_breaker()
+        breaker.reset_timeout = 60
+        breaker._opened_at -= 60
+        breaker.record(failed=True, trial=breaker.before_call())
+        self.assertEqual(breaker.state, "open")
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Tests for RetryPolicy with and without a breaker."""
+
+    def test_retries_transient_errors(self):
+        """Transient errors are retried until the call succeeds."""
+        outcomes = [LOCKED, LOCKED, "ok"]
+
+        def flaky():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        policy = RetryPolicy(retries=3, base_delay=0)
+        self.assertEqual(policy.call(flaky), "ok")
+        self.assertEqual(policy.stats["retries"], 2)
+
+    def test_fatal_errors_not_retried(self):
+        """Non-transient errors propagate on the first attempt."""
+        def broken():
+            raise sqlite3.IntegrityError("UNIQUE constraint failed")
+
+        policy = RetryPolicy(retries=3, base_delay=0)
+        with self.assertRaises(sqlite3.IntegrityError):
+            policy.call(broken)
+        self.assertEqual(policy.stats["attempts"], 1)
+
+    def test_interrupted_trial_releases_slot(self):
+        """A trial ending in a BaseException does not wedge the breaker."""
+        def interrupted():
+            raise KeyboardInterrupt
+
+        breaker = open_breaker()
+        policy = RetryPolicy(retries=0, breaker=breaker)
+        with self.assertRaises(KeyboardInterrupt):
+            policy.call(interrupted)
+        self.assertFalse(breaker._trial_running)
+        self.assertEqual(policy.call(lambda: "ok"), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_failing_classifier_releases_slot(self):
+        """A classifier that raises does not wedge the breaker."""
+        def classify(error):
+            raise RuntimeError("classifier bug")
+
+        def broken():
+            raise LOCKED
+
+        breaker = open_breaker()
+        policy = RetryPolicy(retries=0, breaker=breaker, retryable=classify)
+        with self.assertRaises(RuntimeError):
+            policy.call(broken)
+        self.assertFalse(breaker._trial_running)
+
+    def test_cancelled_async_trial_releases_slot(self):
+        """A trial cancelled by wait_for does not wedge the breaker."""
+        async def slow():
+            await asyncio.sleep(10)
+
+        async def fast():
+            return "ok"
+
+        async def scenario():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(policy.call_async(slow), 0.01)
+            return await policy.call_async(fast)
+
+        breaker = open_breaker()
+        policy = RetryPolicy(retries=0, breaker=breaker)
+        self.assertEqual(asyncio.run(scenario()), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+
+class TestRetryOnFailure(unittest.TestCase):
+    """Tests for the retry_on_failure decorator."""
+
+    def test_retries_counts_total_attempts(self):
+        """retries=3 means three attempts in total, as originally."""
+        retry_on_failure = __import__('3-retry_on_failure').retry_on_failure
+        attempts = []
+
+        @retry_on_failure(retries=3, delay=0)
+        def locked():
+            attempts.append(1)
+            raise LOCKED
+
+        with self.assertRaises(sqlite3.OperationalError):
+            locked()
+        self.assertEqual(len(attempts), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for request coalescing.
+"""
+import threading
+import time
+import unittest
+
+from single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Tests for SingleFlight."""
+
+    def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        calls = []
+        started = threading.Barrier(8)
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return "rows"
+
+        def caller(results):
+            started.wait()
+            results.append(flights.do("key", slow))
+
+        results = []
+        threads = [threading.Thread(target=caller, args=(results,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["rows"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.stats, {"executions": 1, "shared": 7})
+        self.assertFalse(flights.in_flight("key"))
+
+    def test_error_is_shared_and_cleared(self):
+        flights = SingleFlight()
+        release = threading.Event()
+
+        def failing():
+            release.wait(5)
+            raise ValueError("boom")
+
+        errors = []
+
+        def caller():
+            try:
+                flights.do("key", failing)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=caller) for _ in range(3)]
+        threads[0].start()
+        while not flights.in_flight("key"):
+            time.sleep(0.001)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(flights.do("key", lambda: "retried"), "retried")
+
+    def test_different_keys_run_separately(self):
+        flights = SingleFlight()
+        self.assertEqual(flights.do("a", lambda: 1), 1)
+        self.assertEqual(flights.do("b", lambda: 2), 2)
+        self.assertEqual(flights.stats["executions"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
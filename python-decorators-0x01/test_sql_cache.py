@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the query-result cache.
+"""
+import unittest
+from unittest import mock
+
+import sql_cache
+from sql_cache import FRESH, MISS, STALE, QueryCache
+
+
+class TestTablesIn(unittest.TestCase):
+    """Tests for tables_in."""
+
+    def test_from_and_join(self):
+        sql = "SELECT * FROM users u JOIN orders o ON o.user_id = u.id"
+        self.assertEqual(sql_cache.tables_in(sql), {"users", "orders"})
+
+    def test_comma_join(self):
+        sql = "SELECT * FROM users u, `Orders` AS o, items WHERE u.id = o.user_id"
+        self.assertEqual(sql_cache.tables_in(sql), {"users", "orders", "items"})
+
+    def test_stops_at_clause(self):
+        sql = "SELECT * FROM users WHERE age > 25 ORDER BY name, age"
+        self.assertEqual(sql_cache.tables_in(sql), {"users"})
+
+
+class TestQueryCache(unittest.TestCase):
+    """Tests for QueryCache eviction, expiry and invalidation."""
+
+    def test_lru_eviction(self):
+        """The least recently used entry goes first once over max_entries."""
+        cache = QueryCache(max_entries=2)
+        cache.store("SELECT 1 FROM a", None, [1])
+        cache.store("SELECT 2 FROM a", None, [2])
+        cache.lookup("SELECT 1 FROM a")
+        cache.store("SELECT 3 FROM a", None, [3])
+        self.assertEqual(cache.lookup("SELECT 1 FROM a"), (True, [1]))
+        self.assertEqual(cache.lookup("SELECT 2 FROM a"), (False, None))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_byte_budget(self):
+        """Entries are evicted to keep the estimated size under max_bytes."""
+        row = ["x" * 1000]
+        cache = QueryCache(max_bytes=sql_cache._sizeof(row) * 2)
+        for i in range(5):
+            cache.store(f"SELECT {i} FROM a", None, row)
+        self.assertLessEqual(cache.get_stats()["bytes"], cache.max_bytes)
+        self.assertEqual(cache.get_stats()["entries"], 2)
+
+    def test_ttl_and_stale_window(self):
+        """Entries go fresh -> stale -> miss as time passes."""
+        cache = QueryCache(default_ttl=10, stale_ttl=5)
+        with mock.patch.object(sql_cache.time, "monotonic", return_value=100.0):
+            cache.store("SELECT * FROM users", None, [1])
+        for now, state in ((105.0, FRESH), (112.0, STALE), (116.0, MISS)):
+            with mock.patch.object(sql_cache.time, "monotonic", return_value=now):
+                self.assertEqual(cache.peek("SELECT * FROM users")[0], state)
+        self.assertEqual(cache.get_stats()["expirations"], 1)
+
+    def test_invalidation(self):
+        """A write to any table an entry reads from drops it."""
+        cache = QueryCache()
+        cache.store("SELECT * FROM users u, orders o", None, [1])
+        cache.store("SELECT * FROM items", None, [2])
+        sql_cache.invalidate_tables({"ORDERS"})
+        self.assertEqual(cache.lookup("SELECT * FROM users u, orders o"), (False, None))
+        self.assertEqual(cache.lookup("SELECT * FROM items"), (True, [2]))
+
+    def test_store_after_invalidation_refused(self):
+        """Rows loaded before an invalidation are not cached after it."""
+        cache = QueryCache()
+        sql = "SELECT * FROM users"
+        generation = cache.generation(sql)
+        cache.invalidate_tables({"users"})  # a commit lands mid-load
+        cache.store(sql, None, ["old rows"], generation=generation)
+        self.assertEqual(cache.lookup(sql), (False, None))
+        self.assertEqual(cache.get_stats()["stale_stores"], 1)
+
+        cache.store(sql, None, ["new rows"], generation=cache.generation(sql))
+        self.assertEqual(cache.lookup(sql), (True, ["new rows"]))
+
+    def test_normalized_key(self):
+        """Whitespace and trailing semicolons don't split entries."""
+        cache = QueryCache()
+        cache.store("SELECT *\n  FROM users;", (1,), [1])
+        self.assertEqual(cache.lookup("SELECT * FROM users", [1]), (True, [1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
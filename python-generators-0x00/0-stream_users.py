@@ -1,11 +1,17 @@
 #!/usr/bin/python3
 import mysql.connector
+seed = __import__('seed')
 
-def stream_users():
+def stream_users(window=None):
     """
     Generator that streams rows from the user_data table one by one.
     Each row is returned as a dictionary with column names as keys.
+
+    With window=n the rows are read through an unbuffered cursor n at a time
+    (see seed.stream_query), so memory stays flat regardless of table size.
     """
+    connection = None
+    cursor = None
     try:
         # Connect to the database
         connection = mysql.connector.connect(
@@ -14,6 +20,12 @@ def stream_users():
             password="your_mysql_password",  # Replace with your MySQL password
             database="ALX_prodev"
         )
+        if window:
+            yield from seed.stream_query(
+                connection, "SELECT * FROM user_data",
+                window=window, dictionary=True)
+            return
+
         cursor = connection.cursor(dictionary=True)
 
         # Execute query to fetch all users
@@ -32,5 +44,8 @@ def stream_users():
         if cursor:
             cursor.close()
         if connection:
-            connection.close()
+            try:
+                connection.close()
+            except mysql.connector.Error:
+                pass  # already dropped by an early-stopped stream_query
 
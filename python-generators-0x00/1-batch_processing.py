@@ -1,10 +1,36 @@
 #!/usr/bin/python3
 import mysql.connector
+query_builder = __import__('query_builder')
 
-def stream_users_in_batches(batch_size):
+# Columns held as NumPy arrays in columnar batches; the rest stay lists of str
+NUMERIC_COLUMNS = {"age"}
+
+
+def _to_columns(column_names, rows):
+    """Transpose a list of row tuples into {column: array or list}."""
+    import numpy as np  # only needed for batch_format="columns"
+
+    batch = {}
+    for name, values in zip(column_names, zip(*rows)):
+        if name in NUMERIC_COLUMNS:
+            batch[name] = np.fromiter(values, dtype=np.int64, count=len(rows))
+        else:
+            batch[name] = list(values)
+    return batch
+
+
+def stream_users_in_batches(batch_size, columns=None, filters=(), batch_format="rows"):
     """
     Generator: fetch rows in batches of size batch_size from user_data table.
+    columns limits the selected columns; filters are query_builder predicates
+    (e.g. age_between(25)) evaluated by MySQL instead of in Python.
+
+    batch_format="rows" (default) yields lists of dicts; batch_format="columns"
+    yields one dict per batch mapping column name to a NumPy array (age) or a
+    list of strings, ready for vectorized aggregation.
     """
+    if batch_format not in ("rows", "columns"):
+        raise ValueError(f"Unknown batch_format: {batch_format}")
     connection = None
     cursor = None
     try:
@@ -14,8 +40,17 @@ def stream_users_in_batches(batch_size):
             password="your_mysql_password",
             database="ALX_prodev"
         )
+        if batch_format == "columns":
+            cursor = connection.cursor()
+            cursor.execute(*query_builder.build_select(columns, filters))
+            rows = cursor.fetchmany(batch_size)
+            while rows:
+                yield _to_columns(cursor.column_names, rows)
+                rows = cursor.fetchmany(batch_size)
+            return
+
         cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM user_data")
+        cursor.execute(*query_builder.build_select(columns, filters))
 
         batch = []
         for row in cursor:
@@ -40,10 +75,8 @@ def batch_processing(batch_size):
     """
     Generator: yields users over 25 from batches of data.
     """
-    for batch in stream_users_in_batches(batch_size):
+    over_25 = query_builder.age_between(low=25)
+    for batch in stream_users_in_batches(batch_size, filters=[over_25]):
         for user in batch:
-            if user['age'] > 25:
-                yield user
-
-return
+            yield user
 
@@ -1,30 +1,94 @@
 #!/usr/bin/python3
+import base64
 seed = __import__('seed')
 
+OFFSET_QUERY = "SELECT * FROM user_data LIMIT %s OFFSET %s"
+# The first keyset page seeks past '' so every page runs the same statement
+# and a prepared cursor only has to prepare it once.
+KEYSET_QUERY = "SELECT * FROM user_data WHERE user_id > %s ORDER BY user_id LIMIT %s"
 
-def paginate_users(page_size, offset):
+
+def _fetch_page(query, params, cursor=None):
     """
-    Fetch a single page of users from the database.
-    Returns a list of user dictionaries.
+    Run a page query on the given cursor, or on a short-lived connection
+    when no cursor is passed.
     """
+    if cursor is not None:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
     connection = seed.connect_to_prodev()
     cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
+    cursor.execute(query, params)
     rows = cursor.fetchall()
     cursor.close()
     connection.close()
     return rows
 
 
-def lazy_pagination(page_size):
+def paginate_users(page_size, offset, cursor=None):
+    """
+    Fetch a single page of users from the database.
+    Returns a list of user dictionaries.
+    """
+    return _fetch_page(OFFSET_QUERY, (page_size, offset), cursor)
+
+
+def paginate_users_after(page_size, last_user_id=None, cursor=None):
+    """
+    Fetch the page of users that follows last_user_id (keyset / seek pagination).
+    Seeks on the primary key, so every page costs the same regardless of depth.
+    Returns a list of user dictionaries ordered by user_id.
+    """
+    return _fetch_page(KEYSET_QUERY, (last_user_id or '', page_size), cursor)
+
+
+def resume_token(page):
+    """
+    Opaque token for the position right after the given page.
+    Pass it back to lazy_pagination(..., resume_from=token) to continue there.
+    """
+    last_user_id = page[-1]['user_id']
+    return base64.urlsafe_b64encode(last_user_id.encode()).decode()
+
+
+def _decode_token(token):
+    return base64.urlsafe_b64decode(token.encode()).decode()
+
+
+def lazy_pagination(page_size, keyset=False, resume_from=None, pool=None):
     """
     Generator that lazily fetches paginated user data.
     Yields each page of users as a list.
+
+    With keyset=True pages are fetched by seeking past the last user_id
+    instead of LIMIT/OFFSET; resume_from takes a token from resume_token()
+    so an interrupted export can pick up where it stopped.
+
+    One connection (leased from pool if given) and one prepared cursor are
+    held for the whole scan and released when the generator is exhausted,
+    closed early or garbage collected.
     """
-    offset = 0
-    while True:  # Single loop for lazy pagination
-        page = paginate_users(page_size, offset)
-        if not page:
-            break
-        yield page
-        offset += page_size
+    connection = pool.get_connection() if pool else seed.connect_to_prodev()
+    cursor = connection.cursor(prepared=True, dictionary=True)
+    try:
+        if keyset or resume_from is not None:
+            last_user_id = _decode_token(resume_from) if resume_from else None
+            while True:
+                page = paginate_users_after(page_size, last_user_id, cursor)
+                if not page:
+                    break
+                yield page
+                last_user_id = page[-1]['user_id']
+            return
+
+        offset = 0
+        while True:  # Single loop for lazy pagination
+            page = paginate_users(page_size, offset, cursor)
+            if not page:
+                break
+            yield page
+            offset += page_size
+    finally:
+        cursor.close()
+        connection.close()  # returns the connection when it came from a pool
@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 import seed
+import aggregates
 
 def stream_user_ages():
     """
@@ -25,21 +26,26 @@ def stream_user_ages():
             connection.close()
 
 
-def calculate_average_age():
+def calculate_average_age(server_side=False):
     """
     Calculates and prints the average age using the stream_user_ages generator.
+    With server_side=True MySQL computes the aggregate and no ages are
+    transferred. Returns the full stats dict (see aggregates.py).
     """
-    total_age = 0
-    count = 0
-    for age in stream_user_ages():  # Loop #2
-        total_age += age
-        count += 1
-
-    if count > 0:
-        average = total_age / count
-        print(f"Average age of users: {average}")
+    if server_side:
+        connection = seed.connect_to_prodev()
+        try:
+            stats = aggregates.server_stats(connection)
+        finally:
+            connection.close()
+    else:
+        stats = aggregates.stream_stats(stream_user_ages())  # Loop #2
+
+    if stats["count"] > 0:
+        print(f"Average age of users: {stats['mean']}")
     else:
         print("No users found.")
+    return stats
 
 
 if __name__ == "__main__":
@@ -0,0 +1,178 @@
+#!/usr/bin/python3
+"""
+Aggregates over user_data without shipping the table to Python.
+
+server_stats() lets MySQL compute COUNT/AVG/MIN/MAX/VAR_POP and percentiles
+(percentiles are read through the age index with ORDER BY ... LIMIT 1 OFFSET).
+stream_stats() is the fallback for any iterable of numbers: one pass, O(1)
+memory, exact mean/variance (Welford) and approximate quantiles (P²).
+"""
+import math
+
+query_builder = __import__('query_builder')
+
+DEFAULT_PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def nearest_rank(p, count):
+    """0-based index of the nearest-rank p-th percentile among `count` sorted values."""
+    return max(math.ceil(round(p * count, 9)) - 1, 0)  # 0.07 * 100 is 7.000000000000001
+
+
+def server_stats(connection, column="age", percentiles=DEFAULT_PERCENTILES, filters=()):
+    """
+    Compute count, mean, variance, min, max and the requested percentiles of
+    `column` inside MySQL. Percentiles use the nearest-rank definition (the
+    smallest value with at least p of the values at or below it); numbers
+    are returned as floats, as in stream_stats().
+    """
+    if column not in query_builder.COLUMNS:
+        raise ValueError(f"Unknown column: {column}")
+    where, params = query_builder.build_where(filters)
+
+    cursor = connection.cursor()
+    cursor.execute(
+        f"SELECT COUNT({column}), AVG({column}), VAR_POP({column}), "
+        f"MIN({column}), MAX({column}) FROM user_data{where}", params)
+    count, mean, variance, minimum, maximum = cursor.fetchone()
+    stats = {
+        "count": count,
+        "mean": float(mean) if count else None,
+        "variance": float(variance) if count else None,
+        "min": float(minimum) if count else None,
+        "max": float(maximum) if count else None,
+    }
+    for p in percentiles:
+        value = None
+        if count:
+            cursor.execute(
+                f"SELECT {column} FROM user_data{where} "
+                f"ORDER BY {column} LIMIT 1 OFFSET %s",
+                params + (nearest_rank(p, count),))
+            value = float(cursor.fetchone()[0])
+        stats[f"p{p * 100:g}"] = value
+    cursor.close()
+    return stats
+
+
+class RunningStats:
+    """Welford's online mean / variance, plus min and max."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, x):
+        x = float(x)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+
+    @property
+    def variance(self):
+        """Population variance (matches MySQL VAR_POP)."""
+        return self._m2 / self.count if self.count else None
+
+    @property
+    def stddev(self):
+        return math.sqrt(self._m2 / self.count) if self.count else None
+
+
+class P2Quantile:
+    """
+    P² streaming quantile estimator (Jain & Chlamtac, 1985).
+    Keeps five markers whatever the stream length.
+    """
+
+    def __init__(self, p):
+        if not 0 < p < 1:
+            raise ValueError("p must be between 0 and 1")
+        self.p = p
+        self._initial = []
+        self._heights = None
+        self._positions = None
+        self._desired = None
+        self._increments = (0.0, p / 2, p, (1 + p) / 2, 1.0)
+
+    def add(self, x):
+        x = float(x)
+        if self._heights is None:
+            self._initial.append(x)
+            if len(self._initial) == 5:
+                p = self.p
+                self._heights = sorted(self._initial)
+                self._positions = [1, 2, 3, 4, 5]
+                self._desired = [1.0, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5.0]
+            return
+
+        q, n = self._heights, self._positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self._heights, self._positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    @property
+    def value(self):
+        if self._heights is not None:
+            return self._heights[2]
+        if not self._initial:
+            return None
+        ordered = sorted(self._initial)
+        return ordered[nearest_rank(self.p, len(ordered))]
+
+
+def stream_stats(values, percentiles=DEFAULT_PERCENTILES):
+    """
+    One pass over `values` returning the same keys as server_stats();
+    percentiles are P² estimates.
+    """
+    running = RunningStats()
+    sketches = [P2Quantile(p) for p in percentiles]
+    for x in values:
+        running.add(x)
+        for sketch in sketches:
+            sketch.add(x)
+    stats = {
+        "count": running.count,
+        "mean": running.mean if running.count else None,
+        "variance": running.variance,
+        "min": running.min,
+        "max": running.max,
+    }
+    for sketch in sketches:
+        stats[f"p{sketch.p * 100:g}"] = sketch.value
+    return stats
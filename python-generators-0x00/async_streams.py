@@ -0,0 +1,137 @@
+#!/usr/bin/python3
+"""
+Async-generator versions of the streaming helpers, for use inside asyncio
+services. Same semantics as 0-stream_users / 1-batch_processing /
+2-lazy_paginate / 4-stream_ages, but on aiosqlite against a SQLite copy of
+user_data; closing a generator early (aclose(), or leaving an
+aclosing() block) closes its cursor and connection right away, since each
+wrapper closes the generator it reads from.
+"""
+import csv
+import sqlite3
+import uuid
+from contextlib import aclosing
+
+import aiosqlite
+
+query_builder = __import__('query_builder')
+
+DB_PATH = "user_data.db"
+
+# query_builder emits MySQL-style %s placeholders; sqlite3 wants ?
+def _sqlite_params(sql):
+    return sql.replace("%s", "?")
+
+
+def create_sqlite_fixture(path=DB_PATH, csv_file=None, rows=0):
+    """
+    Create (or reset) a SQLite user_data table, loaded from csv_file and/or
+    filled with `rows` synthetic users. Returns the number of rows inserted.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE IF EXISTS user_data")
+    conn.execute("""
+        CREATE TABLE user_data (
+            user_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            age INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX idx_user_data_age ON user_data (age)")
+    count = 0
+    if csv_file:
+        with open(csv_file, newline='') as f:
+            data = [(str(uuid.uuid4()), r['name'], r['email'], int(float(r['age'])))
+                    for r in csv.DictReader(f)]
+        conn.executemany("INSERT INTO user_data VALUES (?, ?, ?, ?)", data)
+        count += len(data)
+    if rows:
+        conn.executemany(
+            "INSERT INTO user_data VALUES (?, ?, ?, ?)",
+            ((str(uuid.uuid4()), f"user{i}", f"user{i}@example.com", 18 + i % 80)
+             for i in range(rows)))
+        count += rows
+    conn.commit()
+    conn.close()
+    return count
+
+
+async def _rows(sql, params=(), db_path=DB_PATH, arraysize=500):
+    async with aiosqlite.connect(db_path) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute(sql, params) as cursor:
+            while True:
+                rows = await cursor.fetchmany(arraysize)
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(row)
+
+
+async def stream_users(db_path=DB_PATH):
+    """Async generator: user_data rows one by one as dictionaries."""
+    async with aclosing(_rows("SELECT * FROM user_data", db_path=db_path)) as rows:
+        async for row in rows:
+            yield row
+
+
+async def stream_users_in_batches(batch_size, columns=None, filters=(), db_path=DB_PATH):
+    """Async generator: lists of up to batch_size rows, filtered in SQL."""
+    sql, params = query_builder.build_select(columns, filters)
+    batch = []
+    async with aclosing(_rows(_sqlite_params(sql), params, db_path,
+                              arraysize=batch_size)) as rows:
+        async for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+async def batch_processing(batch_size, db_path=DB_PATH):
+    """Async generator: users over 25, read in batches."""
+    over_25 = query_builder.age_between(low=25)
+    async with aclosing(stream_users_in_batches(
+            batch_size, filters=[over_25], db_path=db_path)) as batches:
+        async for batch in batches:
+            for user in batch:
+                yield user
+
+
+async def lazy_pagination(page_size, last_user_id=None, db_path=DB_PATH):
+    """
+    Async generator: pages of users ordered by user_id, fetched by keyset
+    seek on one connection; last_user_id resumes after that key.
+    """
+    async with aiosqlite.connect(db_path) as db:
+        db.row_factory = aiosqlite.Row
+        while True:
+            async with db.execute(
+                    "SELECT * FROM user_data WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                    (last_user_id or '', page_size)) as cursor:
+                page = [dict(row) for row in await cursor.fetchall()]
+            if not page:
+                return
+            yield page
+            last_user_id = page[-1]['user_id']
+
+
+async def stream_user_ages(db_path=DB_PATH):
+    """Async generator: user ages one by one."""
+    async with aclosing(_rows("SELECT age FROM user_data", db_path=db_path)) as rows:
+        async for row in rows:
+            yield row['age']
+
+
+async def calculate_average_age(db_path=DB_PATH):
+    """Average user age (None for an empty table) using stream_user_ages."""
+    total_age = 0
+    count = 0
+    async with aclosing(stream_user_ages(db_path)) as ages:
+        async for age in ages:
+            total_age += age
+            count += 1
+    return total_age / count if count else None
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""
+Many concurrent async streams on one event loop vs the same streams run
+one after another, with the worst event-loop lag seen meanwhile (the loop
+must stay responsive while streams are running). Builds a SQLite fixture
+with ROWS users first.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import async_streams
+
+ROWS = 100_000
+
+
+async def drain(db_path):
+    count = 0
+    async for _ in async_streams.stream_users(db_path):
+        count += 1
+    return count
+
+
+async def sequential(db_path, streams):
+    return sum([await drain(db_path) for _ in range(streams)])
+
+
+async def concurrent(db_path, streams):
+    return sum(await asyncio.gather(*(drain(db_path) for _ in range(streams))))
+
+
+async def with_loop_lag(coro, interval=0.01):
+    """Run coro while measuring the worst event-loop scheduling delay."""
+    worst = 0.0
+
+    async def ticker():
+        nonlocal worst
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            worst = max(worst, loop.time() - expected)
+
+    tick = asyncio.ensure_future(ticker())
+    try:
+        return await coro, worst
+    finally:
+        tick.cancel()
+
+
+def main():
+    streams = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "user_data.db")
+        async_streams.create_sqlite_fixture(db_path, rows=ROWS)
+        for label, runner in (("sequential", sequential), ("concurrent", concurrent)):
+            start = time.perf_counter()
+            rows, lag = asyncio.run(with_loop_lag(runner(db_path, streams)))
+            elapsed = time.perf_counter() - start
+            print(f"{label:>10}: {streams} streams, {rows} rows in {elapsed:.2f}s "
+                  f"({rows / elapsed:,.0f} rows/s, max loop lag {lag * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
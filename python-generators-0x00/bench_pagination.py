@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""
+Compare page latency of LIMIT/OFFSET vs keyset pagination at increasing depths.
+Needs a user_data table with at least as many rows as the deepest offset.
+"""
+import sys
+import time
+
+paginate = __import__('2-lazy_paginate')
+seed = __import__('seed')
+
+OFFSETS = (0, 100_000, 1_000_000)
+PAGE_SIZE = 100
+REPEAT = 5
+
+
+def key_at(offset):
+    """user_id of the row just before position offset (None at the start)."""
+    if offset == 0:
+        return None
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    cursor.execute("SELECT user_id FROM user_data ORDER BY user_id LIMIT 1 OFFSET %s",
+                   (offset - 1,))
+    row = cursor.fetchone()
+    cursor.close()
+    connection.close()
+    return row[0] if row else None
+
+
+def best_of(fn, *args):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'offset':>10} {'LIMIT/OFFSET ms':>16} {'keyset ms':>10}")
+    for offset in OFFSETS:
+        last_user_id = key_at(offset)
+        if offset and last_user_id is None:
+            print(f"{offset:>10} skipped: table has fewer rows", file=sys.stderr)
+            continue
+        t_offset = best_of(paginate.paginate_users, PAGE_SIZE, offset)
+        t_keyset = best_of(paginate.paginate_users_after, PAGE_SIZE, last_user_id)
+        print(f"{offset:>10} {t_offset * 1000:>16.2f} {t_keyset * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
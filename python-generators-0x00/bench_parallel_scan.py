@@ -0,0 +1,24 @@
+#!/usr/bin/python3
+"""
+Report full-table scan throughput (rows/s) for 1, 2, 4 and 8 workers.
+"""
+import time
+
+parallel_scan = __import__('parallel_scan')
+
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def main():
+    print(f"{'workers':>8} {'ordered':>8} {'rows':>10} {'seconds':>8} {'rows/s':>12}")
+    for ordered in (False, True):
+        for workers in WORKER_COUNTS:
+            start = time.perf_counter()
+            rows = sum(1 for _ in parallel_scan.parallel_scan(workers, ordered=ordered))
+            elapsed = time.perf_counter() - start
+            print(f"{workers:>8} {str(ordered):>8} {rows:>10} {elapsed:>8.2f} "
+                  f"{rows / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/python3
+"""
+Parallel full-table scan of user_data.
+
+The user_id key space is split into N contiguous ranges of roughly equal row
+count; each range is read by its own worker process on its own connection
+and the chunks are merged back into a single iterator, either in user_id order
+(range by range) or in arrival order.
+
+Workers read their range as short keyset pages (user_id > last key ORDER BY
+user_id LIMIT chunk_size), each fetched in full before it is queued. A worker
+blocked on a full queue (in ordered mode, every range after the one being
+consumed) therefore holds no half-read result, and MySQL's net_write_timeout
+can't drop its connection however long the consumer takes. How far the
+later ranges run ahead is bounded by queue_size chunks each.
+
+The parent polls its queues and watches the workers, so a worker killed
+before it can report (OOM killer, SIGKILL) raises ScanError instead of
+leaving the consumer blocked forever.
+"""
+import multiprocessing
+import queue as queue_module
+
+seed = __import__('seed')
+query_builder = __import__('query_builder')
+
+
+class _Done:
+    """End-of-range marker sent by worker `worker`."""
+
+    __slots__ = ("worker",)
+
+    def __init__(self, worker):
+        self.worker = worker
+
+
+class ScanError(Exception):
+    """Raised in the parent when a worker fails."""
+
+
+def split_key_ranges(connection, workers):
+    """
+    Return up to `workers` (low, high) user_id ranges covering the table;
+    low is inclusive, high exclusive, None means unbounded. Boundaries are
+    read off the primary key index so ranges hold about the same row count.
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM user_data")
+    (count,) = cursor.fetchone()
+    bounds = []
+    for i in range(1, workers):
+        cursor.execute(
+            "SELECT user_id FROM user_data ORDER BY user_id LIMIT 1 OFFSET %s",
+            (i * count // workers,))
+        row = cursor.fetchone()
+        if row and (not bounds or row[0] > bounds[-1]):
+            bounds.append(row[0])
+    cursor.close()
+    edges = [None] + bounds + [None]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _range_page(key_range, after, columns, page_size):
+    """(sql, params) for the page of `key_range` following user_id `after`."""
+    low, high = key_range
+    filters = []
+    if after is not None:
+        filters.append(("user_id > %s", (after,)))
+    elif low is not None:
+        filters.append(("user_id >= %s", (low,)))
+    if high is not None:
+        filters.append(("user_id < %s", (high,)))
+    sql, params = query_builder.build_select(columns, filters)
+    return f"{sql} ORDER BY user_id LIMIT %s", params + (page_size,)
+
+
+def _scan_worker(index, key_range, columns, chunk_size, queue):
+    """Worker process: page through one key range into `queue`."""
+    connection = None
+    # The keyset needs user_id even when the caller didn't ask for it
+    strip_key = columns is not None and "user_id" not in columns
+    select = [*columns, "user_id"] if strip_key else columns
+    try:
+        connection = seed.connect_to_prodev()
+        if connection is None:
+            raise ScanError("could not connect to ALX_prodev")
+        cursor = connection.cursor(dictionary=True)
+        after = None
+        while True:
+            cursor.execute(*_range_page(key_range, after, select, chunk_size))
+            page = cursor.fetchall()  # whole page read before put() can block
+            if not page:
+                break
+            after = page[-1]["user_id"]
+            if strip_key:
+                for row in page:
+                    del row["user_id"]
+            queue.put(page)
+            if len(page) < chunk_size:
+                break
+        cursor.close()
+        queue.put(_Done(index))
+    except Exception as err:
+        queue.put(ScanError(f"range {key_range}: {err}"))
+    finally:
+        if connection:
+            connection.close()
+
+
+def _drain(queue, producers, poll_interval=1.0):
+    """
+    Yield rows from `queue` until every producer ({index: process}) is done.
+    A producer that has exited without reporting is given one more empty
+    poll to flush what it sent before dying, then fails the scan.
+    """
+    pending = dict(producers)
+    suspects = set()
+    while pending:
+        try:
+            item = queue.get(timeout=poll_interval)
+        except queue_module.Empty:
+            exited = {i for i, process in pending.items() if process.exitcode is not None}
+            lost = exited & suspects
+            if lost:
+                index = min(lost)
+                raise ScanError(f"worker {index} exited with code "
+                                f"{pending[index].exitcode} before finishing its range")
+            suspects = exited
+            continue
+        if isinstance(item, _Done):
+            del pending[item.worker]
+            suspects.discard(item.worker)
+        elif isinstance(item, ScanError):
+            raise item
+        else:
+            yield from item
+
+
+def parallel_scan(workers=4, ordered=False, columns=None, chunk_size=1000, queue_size=8):
+    """
+    Generator yielding every user_data row (as a dict) scanned by `workers`
+    processes. ordered=True yields rows in user_id order; otherwise rows come
+    in whatever order the workers produce them. Each worker buffers at most
+    `queue_size` chunks ahead of the consumer.
+    """
+    connection = seed.connect_to_prodev()
+    try:
+        ranges = split_key_ranges(connection, workers)
+    finally:
+        connection.close()
+
+    ctx = multiprocessing.get_context()
+    if ordered:
+        queues = [ctx.Queue(queue_size) for _ in ranges]
+    else:
+        shared = ctx.Queue(queue_size * len(ranges))
+        queues = [shared] * len(ranges)
+    processes = [
+        ctx.Process(target=_scan_worker,
+                    args=(index, key_range, columns, chunk_size, queue),
+                    daemon=True)
+        for index, (key_range, queue) in enumerate(zip(ranges, queues))
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        if ordered:
+            for index, (queue, process) in enumerate(zip(queues, processes)):
+                yield from _drain(queue, {index: process})
+        else:
+            yield from _drain(shared, dict(enumerate(processes)))
+    finally:
+        # Early close or worker failure: don't leave workers blocked on put();
+        # then reap every worker so none is left as a zombie
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""
+Tiny predicate / projection builder for queries on user_data.
+
+Filters are compiled into the WHERE clause with bind parameters so rows are
+discarded by MySQL (using the age index for range filters) instead of being
+transferred and decoded only to be dropped in Python.
+"""
+
+COLUMNS = ("user_id", "name", "email", "age")
+
+
+def age_between(low=None, high=None):
+    """low < age <= high; either bound may be None."""
+    clauses, params = [], []
+    if low is not None:
+        clauses.append("age > %s")
+        params.append(low)
+    if high is not None:
+        clauses.append("age <= %s")
+        params.append(high)
+    return " AND ".join(clauses), tuple(params)
+
+
+def email_domain(domain):
+    """Users whose email address ends with @domain (% and _ in domain match literally)."""
+    domain = domain.lstrip("@")
+    for char in ("\\", "%", "_"):
+        domain = domain.replace(char, "\\" + char)
+    return "email LIKE %s ESCAPE '\\\\'", ("%@" + domain,)
+
+
+def build_select(columns=None, filters=()):
+    """
+    Build (sql, params) selecting `columns` (all by default) from user_data,
+    AND-ing together the (clause, params) pairs in `filters`.
+    """
+    columns = columns or COLUMNS
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(sorted(unknown))}")
+
+    where, params = build_where(filters)
+    return f"SELECT {', '.join(columns)} FROM user_data{where}", params
+
+
+def build_where(filters=()):
+    """
+    Build (" WHERE ...", params) AND-ing together the (clause, params) pairs
+    in `filters`; ("", ()) when there is nothing to filter on.
+    """
+    clauses, params = [], []
+    for clause, clause_params in filters:
+        if clause:
+            clauses.append(f"({clause})")
+            params.extend(clause_params)
+    if not clauses:
+        return "", ()
+    return " WHERE " + " AND ".join(clauses), tuple(params)
@@ -1,6 +1,8 @@
 #!/usr/bin/python3
 import mysql.connector
 import csv
+import os
+import time
 import uuid
 
 # Connect to MySQL server
@@ -23,13 +25,14 @@ def create_database(connection):
     cursor.close()
 
 # Connect to ALX_prodev database
-def connect_to_prodev():
+def connect_to_prodev(allow_local_infile=False):
     try:
         connection = mysql.connector.connect(
             host="localhost",
             user="root",
             password="your_mysql_password",  # Replace with your MySQL root password
-            database="ALX_prodev"
+            database="ALX_prodev",
+            allow_local_infile=allow_local_infile
         )
         return connection
     except mysql.connector.Error as err:
@@ -45,29 +48,131 @@ def create_table(connection):
             name VARCHAR(255) NOT NULL,
             email VARCHAR(255) NOT NULL,
             age DECIMAL NOT NULL,
-            INDEX(user_id)
+            INDEX(user_id),
+            INDEX idx_user_data_age (age)
         )
     """)
+    # Tables created before the age index existed need it added separately
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = 'user_data'
+          AND index_name = 'idx_user_data_age'
+    """)
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("CREATE INDEX idx_user_data_age ON user_data (age)")
     connection.commit()
     print("Table user_data created successfully")
     cursor.close()
 
 # Insert data from CSV
-def insert_data(connection, csv_file):
+# mode="row"    : one INSERT per row, single commit at the end (original path)
+# mode="batch"  : multi-row executemany, one commit per chunk_size rows
+# mode="infile" : LOAD DATA LOCAL INFILE, falls back to "batch" if the server
+#                 or connection refuses local infile
+# Any other mode raises ValueError.
+INSERT_MODES = ("row", "batch", "infile")
+
+
+def insert_data(connection, csv_file, mode="row", chunk_size=1000):
+    if mode not in INSERT_MODES:
+        raise ValueError(f"unknown insert mode {mode!r}; expected one of {INSERT_MODES}")
+    start = time.perf_counter()
+    if mode == "infile":
+        try:
+            inserted = _load_data_infile(connection, csv_file)
+        except mysql.connector.Error as err:
+            print(f"Error: {err} (falling back to batch insert)")
+            connection.rollback()
+            inserted = _insert_batches(connection, csv_file, chunk_size)
+    elif mode == "batch":
+        inserted = _insert_batches(connection, csv_file, chunk_size)
+    else:
+        inserted = _insert_rows(connection, csv_file)
+    _report_throughput(inserted, time.perf_counter() - start)
+    return inserted
+
+
+INSERT_USER = """
+    INSERT INTO user_data (user_id, name, email, age)
+    VALUES (%s, %s, %s, %s)
+"""
+
+
+def _insert_rows(connection, csv_file):
     cursor = connection.cursor()
+    count = 0
     with open(csv_file, newline='') as f:
         reader = csv.DictReader(f)
         for row in reader:
             user_id = str(uuid.uuid4())
-            cursor.execute("""
-                INSERT INTO user_data (user_id, name, email, age)
-                VALUES (%s, %s, %s, %s)
-            """, (user_id, row['name'], row['email'], row['age']))
+            cursor.execute(INSERT_USER, (user_id, row['name'], row['email'], row['age']))
+            count += 1
+    connection.commit()
+    cursor.close()
+    return count
+
+
+def _insert_batches(connection, csv_file, chunk_size):
+    # mysql-connector rewrites executemany on a plain INSERT ... VALUES into a
+    # single multi-row statement, so each chunk is one round trip
+    cursor = connection.cursor()
+    count = 0
+    with open(csv_file, newline='') as f:
+        reader = csv.DictReader(f)
+        chunk = []
+        for row in reader:
+            chunk.append((str(uuid.uuid4()), row['name'], row['email'], row['age']))
+            if len(chunk) == chunk_size:
+                cursor.executemany(INSERT_USER, chunk)
+                connection.commit()
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            cursor.executemany(INSERT_USER, chunk)
+            connection.commit()
+            count += len(chunk)
+    cursor.close()
+    return count
+
+
+def _load_data_infile(connection, csv_file):
+    # Column order is taken from the CSV header; user_id is generated server side.
+    # The connection must be opened with allow_local_infile=True.
+    with open(csv_file, newline='') as f:
+        header = next(csv.reader(f))
+    columns = [c.strip() for c in header]
+    if sorted(columns) != ['age', 'email', 'name']:
+        raise ValueError(f"Unexpected CSV header: {header}")
+
+    cursor = connection.cursor()
+    cursor.execute(f"""
+        LOAD DATA LOCAL INFILE %s INTO TABLE user_data
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+        LINES TERMINATED BY '\\n'
+        IGNORE 1 LINES
+        ({', '.join(columns)})
+        SET user_id = UUID()
+    """, (os.path.abspath(csv_file),))
+    count = cursor.rowcount
     connection.commit()
     cursor.close()
+    return count
+
+
+def _report_throughput(rows, elapsed):
+    rate = rows / elapsed if elapsed > 0 else float('inf')
+    print(f"Inserted {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
 
 # Generator to stream rows one by one
-def stream_rows(connection):
+# window=None keeps the fetchone() loop on a default cursor; an int switches to
+# stream_query(), which keeps at most `window` rows in client memory. The
+# connection belongs to the caller, so stopping early drains the rest of the
+# result rather than shutting the connection down
+def stream_rows(connection, window=None):
+    if window:
+        yield from stream_query(connection, "SELECT * FROM user_data", window=window,
+                                keep_connection=True)
+        return
     cursor = connection.cursor()
     cursor.execute("SELECT * FROM user_data")
     row = cursor.fetchone()
@@ -76,3 +181,36 @@ def stream_rows(connection):
         row = cursor.fetchone()
     cursor.close()
 
+
+# Generator to stream any query with bounded memory: an unbuffered cursor reads
+# the result straight off the socket and fetchmany(window) pulls one window of
+# rows at a time, so client memory does not grow with the table.
+# WARNING: if the generator stops early (break, close(), an error) the rest of
+# the result is still on the wire and the connector can neither reuse nor
+# cleanly close the connection. By default the socket is shut down, which
+# KILLS `connection`; pass keep_connection=True for a connection you don't
+# own, to read and discard the remaining rows (window at a time) instead.
+def stream_query(connection, query, params=(), window=1000, dictionary=False,
+                 keep_connection=False):
+    cursor = connection.cursor(buffered=False, dictionary=dictionary)
+    exhausted = False
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(window)
+            if not rows:
+                exhausted = True
+                break
+            yield from rows
+    finally:
+        if not exhausted and keep_connection:
+            try:
+                while cursor.fetchmany(window):
+                    pass
+                exhausted = True
+            except Exception:
+                pass  # the result can't be read off; fall back to shutdown
+        if exhausted:
+            cursor.close()
+        else:
+            connection.shutdown()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for server_stats, stream_stats and the P² quantile estimator.
+
+MySQL is replaced by SQLite: the stand-in translates %s placeholders, adds
+VAR_POP, and returns the age column (and AVG) as Decimal, as mysql.connector
+does for a DECIMAL column.
+"""
+import math
+import random
+import sqlite3
+import statistics
+import unittest
+from decimal import Decimal
+
+aggregates = __import__('aggregates')
+query_builder = __import__('query_builder')
+
+_rng = random.Random(7)
+AGES = [_rng.randint(18, 90) for _ in range(1000)]
+
+
+class VarPop:
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        return statistics.pvariance(self.values) if self.values else None
+
+
+class DecimalCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, query, params=()):
+        self.counted = query.startswith("SELECT COUNT(")
+        self.cursor.execute(query.replace("%s", "?"), params)
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        start = 1 if self.counted else 0  # COUNT() stays an int
+        return row[:start] + tuple(Decimal(v) if isinstance(v, (int, float)) else v
+                                   for v in row[start:])
+
+    def close(self):
+        self.cursor.close()
+
+
+class MySQLStandIn:
+    def __init__(self, ages):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.create_aggregate("VAR_POP", 1, VarPop)
+        self.conn.execute("CREATE TABLE user_data (user_id TEXT, name TEXT, email TEXT, age INTEGER)")
+        self.conn.executemany("INSERT INTO user_data VALUES (?, 'n', 'e', ?)",
+                              [(str(i), age) for i, age in enumerate(ages)])
+
+    def cursor(self):
+        return DecimalCursor(self.conn.cursor())
+
+    def close(self):
+        self.conn.close()
+
+
+def nearest_rank(values, p):
+    """Textbook nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p * len(ordered)) - 1, 0)]
+
+
+class TestNearestRank(unittest.TestCase):
+    def test_definition(self):
+        values = list(range(1, 11))
+        self.assertEqual(values[aggregates.nearest_rank(0.5, 10)], 5)
+        self.assertEqual(values[aggregates.nearest_rank(0.9, 10)], 9)
+        self.assertEqual(values[aggregates.nearest_rank(0.99, 10)], 10)
+        self.assertEqual(values[aggregates.nearest_rank(0.01, 10)], 1)
+
+    def test_float_products(self):
+        self.assertEqual(aggregates.nearest_rank(0.07, 100), 6)
+
+
+class TestServerStats(unittest.TestCase):
+    def setUp(self):
+        self.conn = MySQLStandIn(AGES)
+        self.addCleanup(self.conn.close)
+
+    def test_matches_python(self):
+        stats = aggregates.server_stats(self.conn)
+        self.assertEqual(stats["count"], len(AGES))
+        self.assertAlmostEqual(stats["mean"], statistics.fmean(AGES))
+        self.assertAlmostEqual(stats["variance"], statistics.pvariance(AGES))
+        self.assertEqual((stats["min"], stats["max"]), (min(AGES), max(AGES)))
+        for p in aggregates.DEFAULT_PERCENTILES:
+            self.assertEqual(stats[f"p{p * 100:g}"], nearest_rank(AGES, p))
+
+    def test_returns_floats_like_stream_stats(self):
+        server = aggregates.server_stats(self.conn)
+        stream = aggregates.stream_stats(AGES)
+        self.assertEqual(server.keys(), stream.keys())
+        for key in ("mean", "variance", "min", "max", "p50", "p90", "p99"):
+            self.assertIs(type(server[key]), float, key)
+            self.assertIs(type(stream[key]), float, key)
+
+    def test_filters(self):
+        stats = aggregates.server_stats(self.conn, filters=[query_builder.age_between(30, 40)])
+        selected = [age for age in AGES if 30 < age <= 40]
+        self.assertEqual(stats["count"], len(selected))
+        self.assertEqual(stats["p50"], nearest_rank(selected, 0.5))
+
+    def test_empty(self):
+        stats = aggregates.server_stats(MySQLStandIn([]))
+        self.assertEqual(stats["count"], 0)
+        self.assertIsNone(stats["min"])
+        self.assertIsNone(stats["p50"])
+
+    def test_unknown_column(self):
+        with self.assertRaises(ValueError):
+            aggregates.server_stats(self.conn, column="age; DROP TABLE user_data")
+
+
+class TestStreamStats(unittest.TestCase):
+    def test_exact_moments(self):
+        stats = aggregates.stream_stats(AGES)
+        self.assertEqual(stats["count"], len(AGES))
+        self.assertAlmostEqual(stats["mean"], statistics.fmean(AGES))
+        self.assertAlmostEqual(stats["variance"], statistics.pvariance(AGES))
+        self.assertEqual((stats["min"], stats["max"]), (min(AGES), max(AGES)))
+
+    def test_empty(self):
+        stats = aggregates.stream_stats([])
+        self.assertEqual(stats["count"], 0)
+        self.assertIsNone(stats["mean"])
+        self.assertIsNone(stats["p50"])
+
+
+class TestP2Quantile(unittest.TestCase):
+    def test_close_to_exact_quantile(self):
+        rng = random.Random(1)
+        values = [rng.gauss(0, 1) for _ in range(20000)]
+        ordered = sorted(values)
+        for p in (0.5, 0.9, 0.99):
+            sketch = aggregates.P2Quantile(p)
+            for x in values:
+                sketch.add(x)
+            exact = ordered[aggregates.nearest_rank(p, len(values))]
+            self.assertAlmostEqual(sketch.value, exact, delta=0.05)
+
+    def test_fewer_than_five_values_are_exact(self):
+        sketch = aggregates.P2Quantile(0.5)
+        for x in (4, 1, 3, 2):
+            sketch.add(x)
+        self.assertEqual(sketch.value, 2.0)
+
+    def test_rejects_bad_p(self):
+        for p in (0, 1, 1.5):
+            with self.assertRaises(ValueError):
+                aggregates.P2Quantile(p)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the async streaming generators against a local SQLite fixture.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import async_streams
+
+ROWS = 1000
+
+
+class TestAsyncStreams(unittest.IsolatedAsyncioTestCase):
+    """Tests for async_streams generators."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Build a SQLite user_data fixture shared by all tests."""
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls.tmpdir.name, "user_data.db")
+        async_streams.create_sqlite_fixture(cls.db_path, rows=ROWS)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    async def test_stream_users(self):
+        """stream_users yields every row as a dict."""
+        rows = [row async for row in async_streams.stream_users(self.db_path)]
+        self.assertEqual(len(rows), ROWS)
+        self.assertEqual(set(rows[0]), {"user_id", "name", "email", "age"})
+
+    async def test_stream_users_in_batches(self):
+        """Batches have batch_size rows except possibly the last."""
+        sizes = [len(batch) async for batch in
+                 async_streams.stream_users_in_batches(300, db_path=self.db_path)]
+        self.assertEqual(sizes, [300, 300, 300, 100])
+
+    async def test_batch_processing(self):
+        """batch_processing yields only users over 25."""
+        users = [u async for u in async_streams.batch_processing(100, self.db_path)]
+        self.assertTrue(users)
+        self.assertTrue(all(u["age"] > 25 for u in users))
+
+    async def test_lazy_pagination(self):
+        """Pages cover the table once, in user_id order, and can resume."""
+        pages = [p async for p in async_streams.lazy_pagination(128, db_path=self.db_path)]
+        ids = [row["user_id"] for page in pages for row in page]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), ROWS)
+
+        resumed = [p async for p in async_streams.lazy_pagination(
+            128, last_user_id=pages[0][-1]["user_id"], db_path=self.db_path)]
+        self.assertEqual(resumed, pages[1:])
+
+    async def test_calculate_average_age(self):
+        """Average matches the fixture's synthetic ages."""
+        expected = sum(18 + i % 80 for i in range(ROWS)) / ROWS
+        self.assertEqual(await async_streams.calculate_average_age(self.db_path), expected)
+
+    async def test_early_close(self):
+        """aclose() on any wrapper closes its connection immediately."""
+        connect = async_streams.aiosqlite.connect
+        for make in (lambda: async_streams.stream_users(self.db_path),
+                     lambda: async_streams.batch_processing(10, self.db_path),
+                     lambda: async_streams.stream_user_ages(self.db_path),
+                     lambda: async_streams.lazy_pagination(10, db_path=self.db_path)):
+            opened = []
+
+            def tracking_connect(*args, **kwargs):
+                conn = connect(*args, **kwargs)
+                opened.append(conn)
+                return conn
+
+            with mock.patch.object(async_streams.aiosqlite, "connect", tracking_connect):
+                rows = make()
+                await rows.__anext__()
+                self.assertIsNotNone(opened[0]._connection)
+                await rows.aclose()
+            self.assertIsNone(opened[0]._connection)
+            with self.assertRaises(StopAsyncIteration):
+                await rows.__anext__()
+
+
+if __name__ == "__main__":
+    unittest.main()
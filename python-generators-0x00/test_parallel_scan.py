@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests for the parallel scan: key-range splitting, merging and worker loss.
+
+MySQL is replaced by an in-memory table of user_ids; worker processes
+inherit the patches, so these tests need the fork start method.
+"""
+import multiprocessing
+import os
+import signal
+import unittest
+from unittest.mock import patch
+
+parallel_scan = __import__('parallel_scan')
+
+USER_IDS = [f"{i:04d}" for i in range(0, 1000, 3)]
+FORK = multiprocessing.get_start_method() == "fork"
+
+
+class FakeCursor:
+    """Answers split_key_ranges' queries and the workers' keyset pages."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.result = None
+
+    def execute(self, query, params=()):
+        if query.startswith("SELECT COUNT(*)"):
+            self.result = [(len(self.ids),)]
+        elif "OFFSET" in query:
+            (offset,) = params
+            self.result = [(self.ids[offset],)] if offset < len(self.ids) else []
+        else:
+            self.result = self._page(query, list(params))
+
+    def _page(self, query, params):
+        limit = params.pop()
+        after = params.pop(0) if "user_id > %s" in query else None
+        low = params.pop(0) if "user_id >= %s" in query else None
+        high = params.pop(0) if "user_id < %s" in query else None
+        rows = [{"user_id": i, "name": f"user{i}"} for i in self.ids
+                if (after is None or i > after) and (low is None or i >= low)
+                and (high is None or i < high)]
+        return rows[:limit]
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, ids=USER_IDS):
+        self.ids = ids
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self.ids)
+
+    def close(self):
+        pass
+
+
+def scan(key="user_id", **kwargs):
+    with patch.object(parallel_scan.seed, "connect_to_prodev", FakeConnection):
+        return [row[key] for row in parallel_scan.parallel_scan(**kwargs)]
+
+
+class TestSplitKeyRanges(unittest.TestCase):
+    """Tests for split_key_ranges."""
+
+    def test_ranges_cover_table(self):
+        ranges = parallel_scan.split_key_ranges(FakeConnection(), 4)
+        self.assertEqual(len(ranges), 4)
+        self.assertIsNone(ranges[0][0])
+        self.assertIsNone(ranges[-1][1])
+        for (_, high), (low, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(high, low)
+
+    def test_ranges_are_balanced(self):
+        ranges = parallel_scan.split_key_ranges(FakeConnection(), 4)
+        sizes = [sum(1 for i in USER_IDS
+                     if (low is None or i >= low) and (high is None or i < high))
+                 for low, high in ranges]
+        self.assertEqual(sum(sizes), len(USER_IDS))
+        self.assertLessEqual(max(sizes) - min(sizes), 1)
+
+    def test_more_workers_than_rows(self):
+        ranges = parallel_scan.split_key_ranges(FakeConnection(["a", "b"]), 8)
+        # Duplicate boundaries collapse; there are never more ranges than rows + 1
+        self.assertEqual(ranges, [(None, "a"), ("a", "b"), ("b", None)])
+
+
+@unittest.skipUnless(FORK, "worker processes must inherit the patches")
+class TestParallelScan(unittest.TestCase):
+    """Tests for parallel_scan merging and worker failure."""
+
+    def test_ordered_merge(self):
+        self.assertEqual(scan(workers=4, ordered=True, chunk_size=7), USER_IDS)
+
+    def test_unordered_merge(self):
+        rows = scan(workers=4, ordered=False, chunk_size=7)
+        self.assertEqual(sorted(rows), USER_IDS)
+
+    def test_pages_smaller_than_range(self):
+        """Ranges larger than chunk_size are read page by page without gaps."""
+        self.assertEqual(scan(workers=2, ordered=True, chunk_size=10), USER_IDS)
+
+    def test_key_added_for_paging_is_stripped(self):
+        """Selecting columns without user_id still pages, and omits the key."""
+        with patch.object(parallel_scan.seed, "connect_to_prodev", FakeConnection):
+            rows = list(parallel_scan.parallel_scan(workers=3, ordered=True,
+                                                    columns=["name"], chunk_size=50))
+        self.assertEqual(rows, [{"name": f"user{i}"} for i in USER_IDS])
+
+    def test_early_close_reaps_workers(self):
+        """Closing the generator early leaves no live or zombie workers."""
+        with patch.object(parallel_scan.seed, "connect_to_prodev", FakeConnection):
+            rows = parallel_scan.parallel_scan(workers=4, ordered=True, chunk_size=5,
+                                               queue_size=1)
+            next(rows)
+            rows.close()
+        with self.assertRaises(ChildProcessError):  # nothing left to reap
+            os.waitpid(-1, os.WNOHANG)
+
+    def test_killed_worker_raises(self):
+        """A worker killed before reporting fails the scan instead of hanging."""
+        ctx = multiprocessing.get_context()
+        queue = ctx.Queue()
+        process = ctx.Process(target=_put_then_die, args=(queue,), daemon=True)
+        process.start()
+        rows = []
+        with self.assertRaises(parallel_scan.ScanError):
+            for row in parallel_scan._drain(queue, {0: process}, poll_interval=0.05):
+                rows.append(row)
+        self.assertEqual(rows, [{"user_id": "0000"}])
+        process.join()
+
+
+def _put_then_die(queue):
+    queue.put([{"user_id": "0000"}])
+    queue.close()
+    queue.join_thread()  # flush before dying, as a worker mid-scan would have
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+if __name__ == "__main__":
+    unittest.main()
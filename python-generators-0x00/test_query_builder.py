@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Tests for the query_builder predicates.
+"""
+import unittest
+
+query_builder = __import__('query_builder')
+
+
+class TestEmailDomain(unittest.TestCase):
+    def test_wildcards_are_escaped(self):
+        clause, params = query_builder.email_domain("@my_site%.com")
+        self.assertEqual(clause, "email LIKE %s ESCAPE '\\\\'")
+        self.assertEqual(params, ("%@my\\_site\\%.com",))
+
+    def test_backslash_is_escaped(self):
+        self.assertEqual(query_builder.email_domain("a\\b.com")[1], ("%@a\\\\b.com",))
+
+    def test_build_select(self):
+        sql, params = query_builder.build_select(
+            ["email"], [query_builder.email_domain("example.com"), query_builder.age_between(25)])
+        self.assertEqual(sql, "SELECT email FROM user_data "
+                              "WHERE (email LIKE %s ESCAPE '\\\\') AND (age > %s)")
+        self.assertEqual(params, ("%@example.com", 25))
+
+
+if __name__ == "__main__":
+    unittest.main()
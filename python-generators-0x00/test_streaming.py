@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Memory tests for the windowed streaming mode of stream_users / seed.stream_query.
+
+The cursor here is a synthetic stand-in, not mysql.connector's unbuffered
+cursor: these tests bound the memory of the Python generators only. Whether
+the connector really keeps just one window client-side needs a live MySQL
+server and is not covered here.
+"""
+import importlib.util
+import tracemalloc
+import unittest
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+seed = __import__('seed')
+stream_users = __import__('0-stream_users').stream_users
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+TABLE_ROWS = 1_000_000
+WINDOW = 1000
+MEMORY_CEILING = 2 * 1024 * 1024  # bytes
+
+
+class SyntheticCursor:
+    """Unbuffered cursor stand-in that produces rows on demand."""
+
+    def __init__(self, rows, dictionary=False):
+        self.remaining = rows
+        self.dictionary = dictionary
+        self.closed = False
+
+    def execute(self, query, params=()):
+        pass
+
+    def fetchmany(self, size):
+        count = min(size, self.remaining)
+        start = TABLE_ROWS - self.remaining
+        self.remaining -= count
+        return [self._row(i) for i in range(start, start + count)]
+
+    def _row(self, i):
+        values = (f"{i:036d}", f"user{i}", f"user{i}@example.com", i % 100)
+        if self.dictionary:
+            return dict(zip(("user_id", "name", "email", "age"), values))
+        return values
+
+    def close(self):
+        self.closed = True
+
+
+def synthetic_connection(rows=TABLE_ROWS):
+    """Connection mock whose cursors stream `rows` synthetic rows."""
+    connection = Mock()
+    connection.cursor.side_effect = (
+        lambda buffered=None, dictionary=False: SyntheticCursor(rows, dictionary))
+    return connection
+
+
+class TestStreamQuery(unittest.TestCase):
+    """Tests for seed.stream_query."""
+
+    def test_memory_ceiling(self):
+        """Streaming 1M synthetic rows keeps the generator's peak memory bounded."""
+        connection = synthetic_connection()
+        tracemalloc.start()
+        count = 0
+        for _ in seed.stream_query(connection, "SELECT * FROM user_data",
+                                   window=WINDOW):
+            count += 1
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertEqual(count, TABLE_ROWS)
+        self.assertLess(peak, MEMORY_CEILING)
+
+    def test_early_close_drops_connection(self):
+        """Closing the generator early shuts the connection down."""
+        connection = synthetic_connection()
+        rows = seed.stream_query(connection, "SELECT * FROM user_data", window=10)
+        next(rows)
+        rows.close()
+        connection.shutdown.assert_called_once()
+
+    def test_early_close_keeps_borrowed_connection(self):
+        """With keep_connection the rest is drained and the connection kept."""
+        connection = synthetic_connection(rows=100)
+        rows = seed.stream_query(connection, "SELECT * FROM user_data", window=10,
+                                 keep_connection=True)
+        next(rows)
+        rows.close()
+        connection.shutdown.assert_not_called()
+
+    def test_stream_rows_keeps_connection(self):
+        """stream_rows never shuts down the caller's connection."""
+        connection = synthetic_connection(rows=100)
+        rows = seed.stream_rows(connection, window=10)
+        next(rows)
+        rows.close()
+        connection.shutdown.assert_not_called()
+
+
+class TestStreamUsers(unittest.TestCase):
+    """Tests for stream_users in windowed mode."""
+
+    @patch('mysql.connector.connect')
+    def test_memory_ceiling(self, mock_connect):
+        """stream_users(window=n) yields dict rows; generator memory stays bounded."""
+        mock_connect.return_value = synthetic_connection()
+        tracemalloc.start()
+        count = 0
+        for row in stream_users(window=WINDOW):
+            count += 1
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertEqual(count, TABLE_ROWS)
+        self.assertEqual(row["age"], (TABLE_ROWS - 1) % 100)
+        self.assertLess(peak, MEMORY_CEILING)
+
+
+class DecimalAgeCursor:
+    """Buffered cursor stand-in returning age as Decimal, as for a DECIMAL column."""
+
+    column_names = ("user_id", "name", "email", "age")
+
+    def __init__(self, rows, dictionary=False):
+        self.rows = [(f"{i:036d}", f"user{i}", f"user{i}@example.com", Decimal(18 + i % 70))
+                     for i in range(rows)]
+        self.dictionary = dictionary
+
+    def execute(self, query, params=()):
+        pass
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def __iter__(self):
+        for row in self.rows:
+            yield dict(zip(self.column_names, row)) if self.dictionary else row
+
+    def close(self):
+        pass
+
+
+class TestColumnarBatches(unittest.TestCase):
+    """Tests for stream_users_in_batches(batch_format="columns")."""
+
+    @unittest.skipUnless(HAS_NUMPY, "batch_format='columns' requires numpy")
+    @patch('mysql.connector.connect')
+    def test_matches_row_batches(self, mock_connect):
+        """Columnar batches hold the same values as row batches, ages as int64."""
+        import numpy as np
+
+        connection = Mock()
+        connection.cursor.side_effect = (
+            lambda dictionary=False: DecimalAgeCursor(250, dictionary))
+        mock_connect.return_value = connection
+
+        row_batches = list(stream_users_in_batches(100))
+        column_batches = list(stream_users_in_batches(100, batch_format="columns"))
+        self.assertEqual([len(b) for b in row_batches], [100, 100, 50])
+        self.assertEqual([len(b["age"]) for b in column_batches], [100, 100, 50])
+        for rows, columns in zip(row_batches, column_batches):
+            self.assertEqual(columns["age"].dtype, np.int64)
+            self.assertEqual(columns["age"].tolist(), [int(r["age"]) for r in rows])
+            for name in ("user_id", "name", "email"):
+                self.assertEqual(columns[name], [r[name] for r in rows])
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            next(stream_users_in_batches(10, batch_format="arrow"))
+
+
+if __name__ == "__main__":
+    unittest.main()